@@ -5,6 +5,7 @@ Supports hot-reload of strategy params without restart.
 
 import json
 import threading
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Any, Optional
 import logging
@@ -20,6 +21,8 @@ class Config:
         self._lock = threading.RLock()
         self._data: dict = {}
         self._dirty_keys: list = []  # [(keys_tuple, value), ...]
+        self._batch_depth = 0  # >0 : les set() diffèrent la sauvegarde
+        self._generation = 0  # incrémenté à chaque resynchronisation disque
         self.load()
 
     def load(self):
@@ -27,6 +30,7 @@ class Config:
             with open(self._path, "r") as f:
                 self._data = json.load(f)
             self._dirty_keys.clear()
+            self._generation += 1
         logger.info(f"Config loaded from {self._path}")
 
     def save(self):
@@ -57,6 +61,7 @@ class Config:
             # Synchroniser la mémoire avec le disque
             self._data = disk_data
             self._dirty_keys.clear()
+            self._generation += 1
         logger.info("Config saved to disk")
 
     def get(self, *keys: str, default=None) -> Any:
@@ -79,8 +84,39 @@ class Config:
                 node = node.setdefault(k, {})
             node[keys[-1]] = value
             self._dirty_keys.append((keys, value))
+            if self._batch_depth > 0:
+                return  # Sauvegarde différée jusqu'à la sortie du batch()
         self.save()
 
+    @contextmanager
+    def batch(self):
+        """Grouper plusieurs set() en une seule écriture disque.
+
+        Usage : with cfg.batch(): cfg.set(...); cfg.set(...)
+        Les clés restent marquées dirty ; la fusion/écriture n'a lieu
+        qu'à la sortie du bloc (réentrant).
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                flush = self._batch_depth == 0
+            if flush:
+                self.save()
+
+    @property
+    def generation(self) -> int:
+        """Compteur de resynchronisations mémoire/disque (load/save).
+
+        Permet aux caches construits au-dessus de la config de détecter
+        qu'un état plus frais (ex : édition manuelle rechargée) est arrivé.
+        """
+        with self._lock:
+            return self._generation
+
     # ── Shortcuts ──────────────────────────────────────────────────────────
     @property
     def strategy(self) -> dict:
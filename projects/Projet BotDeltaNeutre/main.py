@@ -29,6 +29,26 @@ from strategies.delta_neutral import DeltaNeutralStrategy
 logger = logging.getLogger(__name__)
 
 
+def _install_fast_event_loop():
+    """Installer uvloop (libuv) comme politique asyncio si disponible.
+
+    Réduit le coût de chaque await/gather/Lock et améliore l'I/O socket
+    des appels API. winloop fournit l'équivalent sous Windows. En l'absence
+    des deux, on reste sur la boucle asyncio par défaut.
+    """
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        logger.debug("Event loop policy : uvloop")
+    except ImportError:
+        try:
+            import winloop
+            asyncio.set_event_loop_policy(winloop.EventLoopPolicy())
+            logger.debug("Event loop policy : winloop")
+        except ImportError:
+            logger.debug("uvloop/winloop indisponibles — boucle asyncio par défaut")
+
+
 async def main():
     # ── Configuration & Logging ──────────────────────────────────────────────
     cfg = get_config("config.json")
@@ -173,8 +193,10 @@ async def main():
     strategy.stop()
     await tg_bot.stop()
     await api.close()
+    await wallet_mgr.close()
     logger.info(translator.t("bot.shutdown_complete"))
 
 
 if __name__ == "__main__":
+    _install_fast_event_loop()
     asyncio.run(main())
@@ -33,12 +33,18 @@ import logging
 from dataclasses import dataclass
 from typing import Optional
 
-from modules.position_manager import PositionManager
+import numpy as np
+
+from modules.position_manager import PositionManager, PositionPatch
 from modules.risk_manager import RiskManager
 from core.logger import TradeLogger
+from utils.numba_utils import rebal_plan
 
 logger = logging.getLogger(__name__)
 
+# Delta net en-dessous duquel on ne rééquilibre pas
+REBAL_EPS = 0.0001
+
 
 @dataclass
 class ExecutionResult:
@@ -72,7 +78,15 @@ class ExecutionEngine:
         self._risk = risk_mgr
         self._cfg = config
         self._trade_log = trade_logger
-        self._lock = asyncio.Lock()
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def _lock_for(self, pair: str) -> asyncio.Lock:
+        """Un lock par paire : les exécutions sur des paires différentes
+        ne se bloquent pas entre elles."""
+        lock = self._locks.get(pair)
+        if lock is None:
+            lock = self._locks[pair] = asyncio.Lock()
+        return lock
 
     # ── Profitability Check ─────────────────────────────────────────────────
 
@@ -106,21 +120,23 @@ class ExecutionEngine:
         Capital is split 50/50 between perp margin and spot hedge.
         Falls back to perp-only if spot hedge fails.
         """
-        async with self._lock:
-            strat = self._cfg.strategy
-            min_size = float(strat.get("min_order_size_usd", 10.0))
-            slippage = float(strat.get("slippage_pct", 0.001)) * 100
-
-            if not self.is_profitable_entry(funding_rate):
-                return ExecutionResult(False, pair, "open",
-                                       error="Entry not profitable after fees")
-
-            if capital_usd < min_size:
-                return ExecutionResult(
-                    False, pair, "open",
-                    error=f"Capital too small: ${capital_usd:.2f} < ${min_size} min"
-                )
+        # Garde-fous pur-calcul évalués AVANT le lock : un candidat non
+        # rentable échoue vite sans jamais entrer dans la section critique.
+        strat = self._cfg.strategy
+        min_size = float(strat.get("min_order_size_usd", 10.0))
+        slippage = float(strat.get("slippage_pct", 0.001)) * 100
+
+        if not self.is_profitable_entry(funding_rate):
+            return ExecutionResult(False, pair, "open",
+                                   error="Entry not profitable after fees")
+
+        if capital_usd < min_size:
+            return ExecutionResult(
+                False, pair, "open",
+                error=f"Capital too small: ${capital_usd:.2f} < ${min_size} min"
+            )
 
+        async with self._lock_for(pair):
             # Split capital: half for perp, half for spot hedge
             perp_capital = capital_usd / 2
             spot_capital = capital_usd / 2
@@ -179,14 +195,16 @@ class ExecutionEngine:
             taker = self._cfg.get("strategy", "taker_fee_pct", default=0.0006)
             fees = capital_usd * taker * (2 if spot_hedged else 1)
 
-            state = await self._pos.get_or_create(pair)
-            state.active = True
-            state.entry_capital = capital_usd
-            state.perp.size = pos_sign * qty
-            state.perp.avg_price = mark_price
-            state.perp.current_price = mark_price
-            state.perp.leverage = 1.0
-            state.spot.size = (1 if spot_is_buy else -1) * spot_qty if spot_hedged else 0
+            # Une seule écriture synchronisée au lieu de 6 mutations champ par champ
+            await self._pos.apply_patch(pair, PositionPatch(
+                active=True,
+                entry_capital=capital_usd,
+                spot_size=(1 if spot_is_buy else -1) * spot_qty if spot_hedged else 0,
+                perp_size=pos_sign * qty,
+                perp_avg_price=mark_price,
+                perp_current_price=mark_price,
+                perp_leverage=1.0,
+            ))
 
             hedge_status = "✅ hedgé" if spot_hedged else "⚠️ non-hedgé"
 
@@ -203,7 +221,7 @@ class ExecutionEngine:
     # ── Close Position ──────────────────────────────────────────────────────
 
     async def close_delta_neutral(self, pair: str) -> ExecutionResult:
-        async with self._lock:
+        async with self._lock_for(pair):
             state = await self._pos.get_or_create(pair)
             if not state.active or state.spot.size == 0:
                 return ExecutionResult(False, pair, "close",
@@ -229,9 +247,9 @@ class ExecutionEngine:
 
             realized = state.total_pnl
             await self._pos.record_realized_pnl(pair, realized)
-            state.active = False
-            state.spot.size = 0
-            state.perp.size = 0
+            await self._pos.apply_patch(pair, PositionPatch(
+                active=False, spot_size=0, perp_size=0
+            ))
 
             self._trade_log.log_trade(
                 pair=pair, side="CLOSE", market_type="DN_PERP_SPLIT",
@@ -249,38 +267,65 @@ class ExecutionEngine:
         If delta > 0: short leg too small → increase short.
         If delta < 0: short leg too large → reduce short.
         """
-        async with self._lock:
-            state = await self._pos.get_or_create(pair)
-            if not state.active:
+        results = await self.rebalance_all([pair])
+        return results[0]
+
+    async def rebalance_all(self, pairs: list[str]) -> list[ExecutionResult]:
+        """
+        Rebalance several pairs in one pass.
+        Side/qty selection is vectorized across pairs (Numba-compiled when
+        available, see utils/numba_utils), then the orders fan out
+        concurrently. Results are aligned with the input list.
+        """
+        if not pairs:
+            return []
+
+        states = [await self._pos.get_or_create(p) for p in pairs]
+        deltas = np.array([s.net_delta if s.active else 0.0 for s in states],
+                          dtype=np.float64)
+        sides, qtys, reduces = rebal_plan(deltas, REBAL_EPS)
+
+        slippage = float(self._cfg.get("strategy", "slippage_pct",
+                                       default=0.001)) * 100
+
+        async def _one(i: int) -> ExecutionResult:
+            pair = pairs[i]
+            # The vectorized plan is only a pre-filter: skip pairs that had
+            # nothing to do at planning time without taking their lock
+            if not states[i].active:
                 return ExecutionResult(False, pair, "rebalance",
                                        error="No active position")
-
-            delta = state.net_delta
-            if abs(delta) < 0.0001:
+            if float(qtys[i]) == 0.0:
                 return ExecutionResult(True, pair, "rebalance")
 
-            slippage = float(self._cfg.get("strategy", "slippage_pct",
-                                           default=0.001)) * 100
-
-            if delta > 0:
-                # Too long → sell more short perp
-                side, reduce = "ask", False
-            else:
-                # Too short → buy back short perp
-                side, reduce = "bid", True
-
-            qty = abs(delta)
-            logger.info(f"[{pair}] Rebalance: {side} {qty:.6f} "
-                        f"(delta={delta:+.6f})")
-
-            result = await self._safe_market_order(pair, side, qty,
-                                                   slippage, reduce)
-            if isinstance(result, Exception):
-                return ExecutionResult(False, pair, "rebalance", error=str(result))
-
-            # Adjust short leg
-            state.perp.size += (-qty if side == "ask" else qty)
-            return ExecutionResult(True, pair, "rebalance", qty=qty)
+            async with self._lock_for(pair):
+                # Re-check under the lock: a concurrent close may have
+                # flattened the position between planning and ordering
+                state = states[i]
+                if not state.active:
+                    return ExecutionResult(False, pair, "rebalance",
+                                           error="No active position")
+                delta = state.net_delta
+                if abs(delta) < REBAL_EPS:
+                    return ExecutionResult(True, pair, "rebalance")
+                qty = abs(delta)
+                side = "ask" if delta > 0 else "bid"
+                logger.info(f"[{pair}] Rebalance: {side} {qty:.6f} "
+                            f"(delta={delta:+.6f})")
+                try:
+                    await self._safe_market_order(pair, side, qty,
+                                                  slippage, delta < 0)
+                except Exception as e:
+                    return ExecutionResult(False, pair, "rebalance",
+                                           error=str(e))
+
+                # Adjust short leg — single synchronized write
+                await self._pos.apply_patch(pair, PositionPatch(
+                    perp_size_delta=(-qty if side == "ask" else qty)
+                ))
+                return ExecutionResult(True, pair, "rebalance", qty=qty)
+
+        return list(await asyncio.gather(*(_one(i) for i in range(len(pairs)))))
 
     # ── Helpers ──────────────────────────────────────────────────────────────
 
@@ -105,6 +105,8 @@ class FundingAnalyzer:
             "current_rate": round(self.current_rate, 8),
             "rate_pct": f"{self.current_rate * 100:.4f}%",
             "ma": round(self.moving_average, 8),
+            # Pré-formaté ici : le rendu Telegram se contente de joindre
+            "ma_pct_str": f"{self.moving_average * 100:.4f}%",
             "std": round(self.std_dev, 8),
             "z_score": round(self.z_score, 3),
             "annualized_pct": f"{self.annualized_rate * 100:.2f}%",
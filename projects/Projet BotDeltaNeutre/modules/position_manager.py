@@ -5,6 +5,7 @@ Maintains real-time delta neutrality state.
 """
 
 import asyncio
+import html
 import logging
 from dataclasses import dataclass, field
 from typing import Optional
@@ -125,6 +126,8 @@ class PairState:
     def summary(self) -> dict:
         return {
             "pair": self.pair,
+            # Pré-échappé pour les messages Telegram en parse_mode HTML
+            "pair_html": html.escape(self.pair),
             "active": self.active,
             "spot_size": round(self.spot.size, 6),
             "perp_size": round(self.perp.size, 6),
@@ -141,6 +144,24 @@ class PairState:
         }
 
 
+@dataclass
+class PositionPatch:
+    """Batched update applied atomically to a PairState.
+
+    Fields left at None are untouched; perp_size_delta is always added.
+    Lets callers coalesce several state writes into a single synchronized
+    write instead of mutating field by field.
+    """
+    active: Optional[bool] = None
+    entry_capital: Optional[float] = None
+    spot_size: Optional[float] = None
+    perp_size: Optional[float] = None
+    perp_size_delta: float = 0.0
+    perp_avg_price: Optional[float] = None
+    perp_current_price: Optional[float] = None
+    perp_leverage: Optional[float] = None
+
+
 class PositionManager:
     """Manages all pair states. Thread-safe via asyncio.Lock."""
 
@@ -155,6 +176,30 @@ class PositionManager:
                 self._pairs[pair] = PairState(pair=pair)
             return self._pairs[pair]
 
+    async def apply_patch(self, pair: str, patch: PositionPatch) -> PairState:
+        """Apply a batch of field updates under one lock acquisition."""
+        async with self._lock:
+            if pair not in self._pairs:
+                self._pairs[pair] = PairState(pair=pair)
+            state = self._pairs[pair]
+            if patch.active is not None:
+                state.active = patch.active
+            if patch.entry_capital is not None:
+                state.entry_capital = patch.entry_capital
+            if patch.spot_size is not None:
+                state.spot.size = patch.spot_size
+            if patch.perp_size is not None:
+                state.perp.size = patch.perp_size
+            if patch.perp_size_delta:
+                state.perp.size += patch.perp_size_delta
+            if patch.perp_avg_price is not None:
+                state.perp.avg_price = patch.perp_avg_price
+            if patch.perp_current_price is not None:
+                state.perp.current_price = patch.perp_current_price
+            if patch.perp_leverage is not None:
+                state.perp.leverage = patch.perp_leverage
+            return state
+
     async def update_prices(self, pair: str, spot_price: float, perp_price: float):
         async with self._lock:
             state = self._pairs.get(pair)
@@ -208,6 +253,20 @@ class PositionManager:
         async with self._lock:
             return sum(s.gross_exposure for s in self._pairs.values())
 
+    async def totals(self) -> dict:
+        """PnL, funding et exposition agrégés en un seul passage.
+
+        Une prise de lock et un parcours des paires au lieu de trois
+        appels total_* successifs.
+        """
+        pnl = funding = exposure = 0.0
+        async with self._lock:
+            for s in self._pairs.values():
+                pnl += s.total_pnl
+                funding += s.perp.funding_collected
+                exposure += s.gross_exposure
+        return {"pnl": pnl, "funding": funding, "exposure": exposure}
+
     async def get_pairs_needing_rebalance(self, threshold: float) -> list[str]:
         async with self._lock:
             return [p for p, s in self._pairs.items()
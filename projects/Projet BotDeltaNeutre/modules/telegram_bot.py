@@ -5,9 +5,12 @@ Entièrement en français pour l'utilisateur.
 """
 
 import asyncio
+import hashlib
 import logging
-from datetime import datetime
+import re
+import time
 from functools import wraps
+from pathlib import Path
 from typing import Optional
 
 from telegram import Update, BotCommand, InlineKeyboardButton, InlineKeyboardMarkup
@@ -19,13 +22,36 @@ from telegram.ext import (
 
 logger = logging.getLogger(__name__)
 
+# Validation rapide des nombres saisis : un match regex coûte bien moins
+# cher que la construction/destruction d'un ValueError de float()
+# Accepte aussi les formes « .5 » et « 5. » que float() reconnaît
+_FLOAT_RE = re.compile(r"^-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?$")
+
+# Lignes de /positions : un seul template compilé par str.format au lieu
+# d'une f-string re-parsée par ligne ; les noms de paires arrivent déjà
+# échappés (pair_html) depuis position_manager.
+_POS_LINE_CMD = (
+    "{flag}<b>{pair}</b>  {state}\n"
+    "  Spot : {spot} | Short perp : {perp:.6f}\n"
+    "  Delta : {delta:.6f} ({ratio})\n"
+    "  Exposition : ${exp:.2f}\n"
+    "  PnL : ${pnl} | ROI : {roi}"
+)
+_POS_LINE_BTN = (
+    "<b>{pair}</b> {flag}\n"
+    "  Spot : {spot} | Short perp : {perp:.6f}\n"
+    "  Delta : {delta:.6f} ({ratio})\n"
+    "  Exposition : ${exp:.2f}\n"
+    "  PnL : ${pnl} | ROI : {roi}"
+)
+
 
 def admin_only(func):
     """Décorateur : restreindre les commandes aux admins autorisés."""
     @wraps(func)
     async def wrapper(self, update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-        cid = update.effective_chat.id
-        if cid not in self._admin_ids:
+        admin_ids = self._admin_ids  # hoisté : un seul LOAD_ATTR sur le chemin chaud
+        if update.effective_chat.id not in admin_ids:
             await update.message.reply_text(self._t.t("bot.unauthorized"))
             return
         return await func(self, update, ctx)
@@ -50,6 +76,51 @@ class TelegramBot:
     Intègre stratégie, positions, risque, wallet et dashboard.
     """
 
+    # Source unique pour l'enregistrement des handlers ET set_my_commands :
+    # (commande, clé i18n de la description, nom de la méthode handler)
+    _COMMANDS = (
+        ("start", "commands.start", "cmd_start"),
+        ("stop", "commands.stop", "cmd_stop"),
+        ("status", "commands.status", "cmd_status"),
+        ("pnl", "commands.pnl", "cmd_pnl"),
+        ("positions", "commands.positions", "cmd_positions"),
+        ("funding", "commands.funding", "cmd_funding"),
+        ("wallet", "commands.wallet", "cmd_wallet"),
+        ("set_threshold", "commands.set_threshold", "cmd_set_threshold"),
+        ("set_leverage", "commands.set_leverage", "cmd_set_leverage"),
+        ("set_max_delta", "commands.set_max_delta", "cmd_set_max_delta"),
+        ("set_capital", "commands.set_capital", "cmd_set_capital"),
+        ("add_funds", "commands.add_funds", "cmd_add_funds"),
+        ("remove_funds", "commands.remove_funds", "cmd_remove_funds"),
+        ("set_pairs", "commands.set_pairs", "cmd_set_pairs"),
+        ("enable_pair", "commands.enable_pair", "cmd_enable_pair"),
+        ("disable_pair", "commands.disable_pair", "cmd_disable_pair"),
+        ("set_k", "commands.set_k", "cmd_set_k"),
+        ("set_poll_interval", "commands.set_poll_interval", "cmd_set_poll_interval"),
+        ("close_all", "commands.close_all", "cmd_close_all"),
+        ("emergency_stop", "commands.emergency_stop", "cmd_emergency_stop"),
+        ("reset_circuit", "commands.reset_circuit", "cmd_reset_circuit"),
+        ("risk_status", "commands.risk_status", "cmd_risk_status"),
+        ("help", "commands.help", "cmd_help"),
+    )
+
+    # Invites des boutons set_* : (label, hint, section, clé config).
+    # Constante de classe — pas de dict réalloué à chaque clic.
+    _SET_PROMPTS = {
+        "set_threshold": ("Seuil de funding", "en décimal, ex: 0.00005 = 0.005%",
+                          "strategy", "funding_threshold"),
+        "set_leverage": ("Levier", "ex: 2.0",
+                         "strategy", "default_leverage"),
+        "set_max_delta": ("Seuil delta rééquilibrage", "en décimal, ex: 0.02 = 2%",
+                          "strategy", "rebalance_delta_threshold"),
+        "set_k": ("Z-score k", "ex: 1.5",
+                  "strategy", "funding_zscore_k"),
+        "set_poll": ("Intervalle polling", "en secondes, ex: 30",
+                     "strategy", "funding_poll_interval_seconds"),
+        "set_capital": ("Capital total", "en USDT, ex: 100",
+                        "strategy", "total_capital_usdt"),
+    }
+
     def __init__(self, config, strategy, position_mgr,
                  risk_mgr, funding_mgr, execution_engine,
                  wallet_mgr=None, translator=None, dashboard_builder=None):
@@ -62,10 +133,77 @@ class TelegramBot:
         self._wallet = wallet_mgr
         self._t = translator
         self._dashboard = dashboard_builder
-        self._admin_ids: set = set(config.get("telegram", "admin_chat_ids") or [])
+        self._admin_ids: frozenset = frozenset(
+            config.get("telegram", "admin_chat_ids") or ())
         self._app: Optional[Application] = None
-        self._start_time = datetime.utcnow()
-        self._pending_input: dict = {}  # {chat_id: {"param": ..., "msg_id": ...}}
+        # Horloge monotone : insensible aux sauts NTP, pas d'allocation
+        # datetime/timedelta par affichage de l'uptime
+        self._start_monotonic = time.monotonic()
+        # Saisies en attente : {chat_id: {"param": ..., "msg_id": ..., "ts": ...}}
+        # Bornée en taille et en âge — les invites abandonnées ne
+        # s'accumulent pas indéfiniment
+        self._pending_input: dict = {}
+        self._pending_ttl = 300.0  # secondes
+        self._pending_max = 1000
+        # Claviers inline rendus, invalidés à chaque mutation de config/état
+        self._kb_cache: dict = {}
+        self._help_text: str = ""  # rendu une fois dans setup()
+        self._help_btn_text: str = ""  # variante courte du bouton Aide
+        self._sep: str = ""  # dashboard.separator, résolu une fois dans setup()
+        self._S: dict = {}  # chaînes traduites statiques, peuplé dans setup()
+        # Dashboard rendu, avec TTL court : les refresh en rafale
+        # n'interrogent pas position_mgr à chaque tap
+        self._dash_cache: Optional[tuple[float, str]] = None
+        self._dash_ttl = 3.0  # secondes
+        # Build en cours : les taps simultanés attendent le même Future
+        self._dash_inflight: Optional[asyncio.Future] = None
+        # Tâches de fond spawnées par le pattern « ack d'abord »
+        self._bg_tasks: set = set()
+        # Résumés de positions, partagés entre les boutons pendant le TTL
+        self._summaries_cache: Optional[tuple[float, list]] = None
+        self._summaries_ttl = 1.5  # secondes
+        # Hash du dernier edit par (chat, message) : les edits identiques
+        # sont sautés sans même l'aller-retour « message is not modified »
+        self._last_edit: dict[tuple[int, int], int] = {}
+        # Dernier refus par chat non autorisé : le spam de clics ne
+        # consomme pas le budget API du bot (une réponse max par 5 s)
+        self._unauth_last: dict[int, float] = {}
+        # Paires actives cachées en mémoire (write-through vers la config).
+        # Set : le test d'appartenance des toggles est O(1)
+        self._enabled_cache: Optional[set] = None
+        self._enabled_gen = -1  # génération config du cache ci-dessus
+
+        # Table de dispatch O(1) des boutons inline (callback_data → handler).
+        # Les boutons dynamiques enable_<pair>/disable_<pair> passent par un
+        # découpage de préfixe dans _button_callback.
+        self._cb_table = {
+            "btn_refresh": self._cb_refresh,
+            "btn_pnl": self._cb_pnl,
+            "btn_positions": self._cb_positions,
+            "btn_funding": self._cb_funding,
+            "btn_risk": self._cb_risk,
+            "btn_start": self._cb_start,
+            "btn_stop": self._cb_stop,
+            "btn_help": self._cb_help,
+            "btn_notif": self._cb_notif,
+            "btn_emergency": self._cb_emergency,
+            "menu_config": self._cb_menu_config,
+            "menu_wallet": self._cb_menu_wallet,
+            "menu_pairs": self._cb_menu_pairs,
+            "set_threshold": self._cb_set_param,
+            "set_leverage": self._cb_set_param,
+            "set_max_delta": self._cb_set_param,
+            "set_k": self._cb_set_param,
+            "set_poll": self._cb_set_param,
+            "set_capital": self._cb_set_param,
+            "input_add_funds": self._cb_input_funds,
+            "input_remove_funds": self._cb_input_funds,
+        }
+        # Boutons dynamiques : préfixe → handler, résolu via partition("_")
+        self._cb_prefix = {
+            "enable": self._cb_enable_pair,
+            "disable": self._cb_disable_pair,
+        }
 
     # ── Setup ────────────────────────────────────────────────────────────────
 
@@ -74,36 +212,47 @@ class TelegramBot:
         self._app = Application.builder().token(token).build()
         self._register_handlers()
         await self._set_commands()
+        # Constantes de traduction résolues une fois : le séparateur est
+        # utilisé dans quasiment chaque message, parfois dans des boucles
+        self._sep = self._t.t("dashboard.separator")
+        t = self._t
+        # Chaînes traduites sans placeholder dynamique : résolues une fois
+        # ici plutôt qu'à chaque appui de bouton
+        self._S = {
+            "pnl_title": t.t("pnl.title"),
+            "pnl_none": t.t("pnl.no_positions"),
+            "pos_title": t.t("positions.title"),
+            "pos_none": t.t("positions.no_positions"),
+            "funding_title": t.t("funding_msg.title"),
+            "funding_none": t.t("funding_msg.no_data"),
+            "risk_title": t.t("risk.title"),
+            "risk_limites": t.t("risk.limites"),
+            "circuit_open": t.t("risk.circuit_open"),
+            "circuit_closed": t.t("risk.circuit_closed"),
+            "statut_actif": t.t("dashboard.statut_actif"),
+            "statut_pause": t.t("dashboard.statut_pause"),
+            "circuit_on": t.t("dashboard.circuit_on"),
+            "circuit_off": t.t("dashboard.circuit_off"),
+            "started": t.t("bot.started"),
+            "stopped": t.t("bot.stopped"),
+            "closing_all": t.t("execution.closing_all"),
+            "emergency_activated": t.t("execution.emergency_activated"),
+            "emergency_done": t.t("execution.emergency_done"),
+        }
+        # Chaînes statiques de /wallet + template de ligne d'allocation
+        # (sans kwargs, t() renvoie le template brut, formaté par ligne)
+        self._wallet_static = (t.t("wallet.title"), t.t("wallet.par_paire"),
+                               t.t("wallet.no_pairs"))
+        self._wallet_pair_tmpl = t.t("wallet.pair_line")
+        # Le /help est entièrement statique : rendu une fois ici
+        # (~25 lookups de traduction économisés par invocation)
+        self._help_text = self._render_help()
+        self._help_btn_text = self._render_help_btn()
         logger.info(self._t.t("bot.telegram_init") if self._t else "Telegram bot initialized")
 
     def _register_handlers(self):
-        cmds = [
-            ("start", self.cmd_start),
-            ("stop", self.cmd_stop),
-            ("status", self.cmd_status),
-            ("pnl", self.cmd_pnl),
-            ("positions", self.cmd_positions),
-            ("funding", self.cmd_funding),
-            ("wallet", self.cmd_wallet),
-            ("set_threshold", self.cmd_set_threshold),
-            ("set_leverage", self.cmd_set_leverage),
-            ("set_max_delta", self.cmd_set_max_delta),
-            ("set_capital", self.cmd_set_capital),
-            ("add_funds", self.cmd_add_funds),
-            ("remove_funds", self.cmd_remove_funds),
-            ("set_pairs", self.cmd_set_pairs),
-            ("enable_pair", self.cmd_enable_pair),
-            ("disable_pair", self.cmd_disable_pair),
-            ("set_k", self.cmd_set_k),
-            ("set_poll_interval", self.cmd_set_poll_interval),
-            ("close_all", self.cmd_close_all),
-            ("emergency_stop", self.cmd_emergency_stop),
-            ("reset_circuit", self.cmd_reset_circuit),
-            ("risk_status", self.cmd_risk_status),
-            ("help", self.cmd_help),
-        ]
-        for name, handler in cmds:
-            self._app.add_handler(CommandHandler(name, handler))
+        for name, _key, method in self._COMMANDS:
+            self._app.add_handler(CommandHandler(name, getattr(self, method)))
         # Callback pour les boutons inline
         self._app.add_handler(CallbackQueryHandler(self._button_callback))
         # Handler pour les saisies texte (paramètres)
@@ -113,32 +262,28 @@ class TelegramBot:
 
     async def _set_commands(self):
         t = self._t
-        commands = [
-            BotCommand("start", t.t("commands.start")),
-            BotCommand("stop", t.t("commands.stop")),
-            BotCommand("status", t.t("commands.status")),
-            BotCommand("pnl", t.t("commands.pnl")),
-            BotCommand("positions", t.t("commands.positions")),
-            BotCommand("funding", t.t("commands.funding")),
-            BotCommand("wallet", t.t("commands.wallet")),
-            BotCommand("set_threshold", t.t("commands.set_threshold")),
-            BotCommand("set_leverage", t.t("commands.set_leverage")),
-            BotCommand("set_max_delta", t.t("commands.set_max_delta")),
-            BotCommand("set_capital", t.t("commands.set_capital")),
-            BotCommand("add_funds", t.t("commands.add_funds")),
-            BotCommand("remove_funds", t.t("commands.remove_funds")),
-            BotCommand("set_pairs", t.t("commands.set_pairs")),
-            BotCommand("enable_pair", t.t("commands.enable_pair")),
-            BotCommand("disable_pair", t.t("commands.disable_pair")),
-            BotCommand("set_k", t.t("commands.set_k")),
-            BotCommand("set_poll_interval", t.t("commands.set_poll_interval")),
-            BotCommand("close_all", t.t("commands.close_all")),
-            BotCommand("emergency_stop", t.t("commands.emergency_stop")),
-            BotCommand("reset_circuit", t.t("commands.reset_circuit")),
-            BotCommand("risk_status", t.t("commands.risk_status")),
-            BotCommand("help", t.t("commands.help")),
-        ]
+        commands = [BotCommand(name, t.t(key))
+                    for name, key, _method in self._COMMANDS]
+        # Telegram met les commandes en cache côté serveur : on ne refait
+        # le RPC que si la liste a changé depuis le dernier démarrage.
+        digest = hashlib.blake2b(
+            repr([(c.command, c.description) for c in commands]).encode(),
+            digest_size=16
+        ).hexdigest()
+        cache_file = Path(self._cfg.get("telegram", "commands_cache_file",
+                                        default="data/tg_commands.hash"))
+        try:
+            if cache_file.exists() and cache_file.read_text().strip() == digest:
+                logger.debug("Commandes Telegram inchangées — set_my_commands sauté")
+                return
+        except OSError:
+            pass
         await self._app.bot.set_my_commands(commands)
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            cache_file.write_text(digest)
+        except OSError as e:
+            logger.warning(f"Impossible d'écrire le cache des commandes : {e}")
 
     # ── Run ──────────────────────────────────────────────────────────────────
 
@@ -146,8 +291,36 @@ class TelegramBot:
         await self.setup()
         await self._app.initialize()
         await self._app.start()
-        await self._app.updater.start_polling(drop_pending_updates=True)
-        logger.info(self._t.t("bot.telegram_polling") if self._t else "Telegram bot polling started")
+
+        # Webhook si configuré (Telegram pousse les updates — pas de
+        # long-polling inactif), sinon fallback sur le polling classique.
+        webhook = self._cfg.get("telegram", "webhook") or {}
+        host = webhook.get("host")
+        if host:
+            token = self._cfg.get("telegram", "token")
+            port = int(webhook.get("port", 8443))
+            await self._app.updater.start_webhook(
+                listen=webhook.get("listen", "0.0.0.0"),
+                port=port,
+                url_path=token,
+                webhook_url=f"https://{host}/{token}",
+                # « or None » : la chaîne vide du config.example ferait
+                # échouer setWebhook (secret_token exige 1 à 256 caractères)
+                secret_token=webhook.get("secret_token") or None,
+                drop_pending_updates=True,
+            )
+            logger.info(f"Telegram bot en mode webhook (https://{host}:{port})")
+        else:
+            # Long-poll 30s + filtre allowed_updates : ~20x moins de
+            # round-trips à vide, et Telegram ne sérialise que les types
+            # d'updates que ce bot gère réellement.
+            await self._app.updater.start_polling(
+                timeout=30,
+                poll_interval=0.0,
+                drop_pending_updates=True,
+                allowed_updates=["message", "callback_query"],
+            )
+            logger.info(self._t.t("bot.telegram_polling") if self._t else "Telegram bot polling started")
 
     async def stop(self):
         if self._app:
@@ -156,16 +329,54 @@ class TelegramBot:
             await self._app.shutdown()
 
     async def send_alert(self, message: str):
-        """Envoyer une alerte à tous les admins (si notifications activées)."""
+        """Envoyer une alerte à tous les admins (si notifications activées).
+
+        Envois concurrents : la latence est celle d'un aller-retour HTTP,
+        pas N fois un aller-retour.
+        """
         if not self._cfg.get("telegram", "trade_notifications", default=True):
             return
-        for cid in self._admin_ids:
-            try:
-                await self._app.bot.send_message(
-                    chat_id=cid, text=message, parse_mode="HTML"
-                )
-            except Exception as e:
-                logger.warning(f"Échec envoi alerte à {cid}: {e}")
+        admins = list(self._admin_ids)
+        results = await asyncio.gather(
+            *(self._app.bot.send_message(chat_id=cid, text=message,
+                                         parse_mode="HTML")
+              for cid in admins),
+            return_exceptions=True
+        )
+        for cid, res in zip(admins, results):
+            if isinstance(res, Exception):
+                logger.warning(f"Échec envoi alerte à {cid}: {res}")
+
+    async def _build_dashboard(self) -> str:
+        """Dashboard rendu, servi depuis le cache pendant _dash_ttl secondes.
+
+        Les taps de refresh rapprochés réutilisent la même chaîne au lieu
+        de ré-agréger PnL/funding/exposition à chaque clic.
+        """
+        now = time.monotonic()
+        cached = self._dash_cache
+        if cached is not None and now - cached[0] < self._dash_ttl:
+            return cached[1]
+        # Coalescence : si un build est déjà en vol (double-tap), on
+        # attend son résultat au lieu d'en lancer un deuxième
+        if self._dash_inflight is not None:
+            return await asyncio.shield(self._dash_inflight)
+        fut = asyncio.get_running_loop().create_future()
+        self._dash_inflight = fut
+        try:
+            text = await self._dashboard.build()
+        except Exception as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            self._dash_inflight = None
+        self._dash_cache = (now, text)
+        fut.set_result(text)
+        return text
+
+    def _invalidate_dash(self):
+        """Invalider le dashboard en cache (après changement d'état)."""
+        self._dash_cache = None
 
     # ── Commandes principales ────────────────────────────────────────────────
 
@@ -173,35 +384,37 @@ class TelegramBot:
     @safe_reply
     async def cmd_start(self, update: Update, ctx: ContextTypes.DEFAULT_TYPE):
         """Démarrer la stratégie et afficher le dashboard."""
-        self._cfg.set("strategy", "active", True)
+        self._cfg_set("strategy", "active", True)
         self._strategy.start()
+        self._invalidate_dash()
 
         # Afficher le dashboard complet avec boutons
         if self._dashboard:
-            dashboard = await self._dashboard.build()
+            dashboard = await self._build_dashboard()
             await update.message.reply_text(
                 dashboard, parse_mode="HTML",
                 reply_markup=self._build_keyboard()
             )
         else:
             await update.message.reply_text(
-                self._t.t("bot.started"), parse_mode="HTML",
+                self._S["started"], parse_mode="HTML",
                 reply_markup=self._build_keyboard()
             )
 
     @admin_only
     @safe_reply
     async def cmd_stop(self, update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-        self._cfg.set("strategy", "active", False)
+        self._cfg_set("strategy", "active", False)
         self._strategy.stop()
-        await update.message.reply_text(self._t.t("bot.stopped"), parse_mode="HTML")
+        self._invalidate_dash()
+        await update.message.reply_text(self._S["stopped"], parse_mode="HTML")
 
     @admin_only
     @safe_reply
     async def cmd_status(self, update: Update, ctx: ContextTypes.DEFAULT_TYPE):
         """Afficher le dashboard complet (rafraîchissable)."""
         if self._dashboard:
-            dashboard = await self._dashboard.build()
+            dashboard = await self._build_dashboard()
             await update.message.reply_text(
                 dashboard, parse_mode="HTML",
                 reply_markup=self._build_keyboard()
@@ -213,21 +426,23 @@ class TelegramBot:
     async def _cmd_status_fallback(self, update: Update):
         """Fallback status si le dashboard n'est pas configuré."""
         t = self._t
-        uptime = datetime.utcnow() - self._start_time
+        secs = int(time.monotonic() - self._start_monotonic)
+        uptime = f"{secs // 3600}h{(secs % 3600) // 60:02d}m{secs % 60:02d}s"
         strat = self._cfg.strategy
         risk_st = self._risk.status()
-        total_pnl = await self._pos.total_pnl()
-        funding = await self._pos.total_funding_collected()
-        exposure = await self._pos.total_exposure()
+        # Un seul passage agrégé sur les positions au lieu de trois
+        totals = await self._pos.totals()
+        total_pnl, funding, exposure = (
+            totals["pnl"], totals["funding"], totals["exposure"])
 
         is_active = strat.get("active", False)
-        status = t.t("dashboard.statut_actif") if is_active else t.t("dashboard.statut_pause")
-        circuit = t.t("dashboard.circuit_on") if risk_st["circuit_open"] else t.t("dashboard.circuit_off")
+        status = self._S["statut_actif"] if is_active else self._S["statut_pause"]
+        circuit = self._S["circuit_on"] if risk_st["circuit_open"] else self._S["circuit_off"]
 
-        sep = t.t("dashboard.separator")
+        sep = self._sep
         msg = (
             f"🤖 <b>Bot Delta Neutre</b>\n{sep}\n"
-            f"⏱ Uptime : {str(uptime).split('.')[0]}\n"
+            f"⏱ Uptime : {uptime}\n"
             f"📍 Stratégie : {status}\n"
             f"⚡ Circuit : {circuit}\n{sep}\n"
             f"💰 PnL total : <b>${total_pnl:.4f}</b>\n"
@@ -254,13 +469,15 @@ class TelegramBot:
             await update.message.reply_text("❌ Module wallet non configuré.")
             return
 
+        exposure_task = asyncio.create_task(self._pos.total_exposure())
         w = self._wallet.snapshot()
-        exposure = await self._pos.total_exposure()
+        exposure = await exposure_task
         avg_lev = self._wallet.get_average_leverage(exposure)
-        sep = t.t("dashboard.separator")
+        sep = self._sep
+        title, par_paire, no_pairs = self._wallet_static
 
         lines = [
-            t.t("wallet.title"),
+            title,
             sep,
             t.t("wallet.capital_initial", amount=w["initial_capital"]),
             t.t("wallet.capital_total", amount=w["total_capital"]),
@@ -280,11 +497,12 @@ class TelegramBot:
         allocs = w.get("allocations", {})
         if allocs:
             lines.append(sep)
-            lines.append(t.t("wallet.par_paire"))
+            lines.append(par_paire)
+            pair_tmpl = self._wallet_pair_tmpl
             for pair, amount in allocs.items():
-                lines.append(t.t("wallet.pair_line", pair=pair, amount=amount))
+                lines.append(pair_tmpl.format(pair=pair, amount=amount))
         else:
-            lines.append(t.t("wallet.no_pairs"))
+            lines.append(no_pairs)
 
         await update.message.reply_text("\n".join(lines), parse_mode="HTML")
 
@@ -295,13 +513,15 @@ class TelegramBot:
         val = self._parse_float(ctx.args, "capital")
         if self._wallet:
             await self._wallet.set_capital(val)
+            self._invalidate_kb()
             await update.message.reply_text(
                 self._t.t("wallet.set_capital_ok", amount=val), parse_mode="HTML"
             )
         else:
-            self._cfg.set("strategy", "total_capital_usdt", val)
+            self._cfg_set("strategy", "total_capital_usdt", val)
             await update.message.reply_text(
-                self._t.t("config_cmds.capital_set", amount=val)
+                self._t.t("config_cmds.capital_set", amount=val),
+                disable_notification=True
             )
 
     @admin_only
@@ -313,6 +533,7 @@ class TelegramBot:
             await update.message.reply_text("❌ Module wallet non configuré.")
             return
         await self._wallet.add_funds(val)
+        self._invalidate_kb()
         await update.message.reply_text(
             self._t.t("wallet.add_funds_ok", amount=val,
                        total=self._wallet.total_capital),
@@ -328,6 +549,7 @@ class TelegramBot:
             await update.message.reply_text("❌ Module wallet non configuré.")
             return
         success = await self._wallet.remove_funds(val)
+        self._invalidate_kb()
         if success:
             await update.message.reply_text(
                 self._t.t("wallet.remove_funds_ok", amount=val,
@@ -346,22 +568,26 @@ class TelegramBot:
     @safe_reply
     async def cmd_pnl(self, update: Update, ctx: ContextTypes.DEFAULT_TYPE):
         t = self._t
-        summaries = await self._pos.all_summaries()
+        summaries, totals = await asyncio.gather(
+            self._pos.all_summaries(),
+            self._pos.totals(),
+        )
+        total_pnl, total_funding = totals["pnl"], totals["funding"]
         if not summaries:
-            await update.message.reply_text(t.t("pnl.no_positions"))
+            await update.message.reply_text(self._S["pnl_none"])
             return
 
-        total_pnl = await self._pos.total_pnl()
-        total_funding = await self._pos.total_funding_collected()
         total_cap = self._wallet.total_capital if self._wallet else \
             self._cfg.get("strategy", "total_capital_usdt", default=1)
 
-        sep = t.t("dashboard.separator")
-        lines = [f"{t.t('pnl.title')}\n{sep}"]
+        sep = self._sep
+        # Template résolu une fois — pas de lookup traducteur par ligne
+        pair_tmpl = t.t("pnl.pair_line")
+        lines = [f"{self._S['pnl_title']}\n{sep}"]
         for s in summaries:
-            lines.append(t.t("pnl.pair_line",
-                             pair=s["pair"], pnl=s["total_pnl"],
-                             roi=s["roi_pct"], funding=s["funding_collected"]))
+            lines.append(pair_tmpl.format(
+                pair=s["pair"], pnl=s["total_pnl"],
+                roi=s["roi_pct"], funding=s["funding_collected"]))
 
         roi = total_pnl / total_cap * 100 if total_cap > 0 else 0
         lines.append(
@@ -378,20 +604,20 @@ class TelegramBot:
         t = self._t
         summaries = await self._pos.all_summaries()
         if not summaries:
-            await update.message.reply_text(t.t("positions.no_positions"))
+            await update.message.reply_text(self._S["pos_none"])
             return
 
-        sep = t.t("dashboard.separator")
-        lines = [f"{t.t('positions.title')}\n{sep}"]
+        sep = self._sep
+        lines = [f"{self._S['pos_title']}\n{sep}"]
         for s in summaries:
-            liq_flag = "🚨" if s.get("near_liquidation") else ""
-            lines.append(
-                f"{liq_flag}<b>{s['pair']}</b>  {'🟢' if s['active'] else '⚪'}\n"
-                f"  Spot : {s['spot_size']} | Short perp : {abs(float(s['perp_size'])):.6f}\n"
-                f"  Delta : {s['net_delta']:.6f} ({s['delta_ratio_pct']})\n"
-                f"  Exposition : ${s['gross_exposure']:.2f}\n"
-                f"  PnL : ${s['total_pnl']} | ROI : {s['roi_pct']}"
-            )
+            lines.append(_POS_LINE_CMD.format(
+                flag="🚨" if s.get("near_liquidation") else "",
+                pair=s.get("pair_html", s["pair"]),
+                state="🟢" if s["active"] else "⚪",
+                spot=s["spot_size"], perp=abs(float(s["perp_size"])),
+                delta=s["net_delta"], ratio=s["delta_ratio_pct"],
+                exp=s["gross_exposure"], pnl=s["total_pnl"],
+                roi=s["roi_pct"]))
         await update.message.reply_text("\n".join(lines), parse_mode="HTML")
 
     @admin_only
@@ -400,16 +626,17 @@ class TelegramBot:
         t = self._t
         summaries = self._funding.all_summaries()
         if not summaries:
-            await update.message.reply_text(t.t("funding_msg.no_data"))
+            await update.message.reply_text(self._S["funding_none"])
             return
 
-        sep = t.t("dashboard.separator")
-        lines = [f"{t.t('funding_msg.title')}\n{sep}"]
+        sep = self._sep
+        pair_tmpl = t.t("funding_msg.pair_line")
+        lines = [f"{self._S['funding_title']}\n{sep}"]
         for s in summaries:
-            lines.append(t.t("funding_msg.pair_line",
-                             pair=s["pair"], rate=s["rate_pct"],
-                             ma=f"{float(s['ma'])*100:.4f}%",
-                             zscore=s["z_score"], ann=s["annualized_pct"]))
+            lines.append(pair_tmpl.format(
+                pair=s["pair"], rate=s["rate_pct"],
+                ma=s["ma_pct_str"],
+                zscore=s["z_score"], ann=s["annualized_pct"]))
         await update.message.reply_text("\n".join(lines), parse_mode="HTML")
 
     # ── Commandes Configuration ──────────────────────────────────────────────
@@ -418,9 +645,10 @@ class TelegramBot:
     @safe_reply
     async def cmd_set_threshold(self, update: Update, ctx: ContextTypes.DEFAULT_TYPE):
         val = self._parse_float(ctx.args, "seuil")
-        self._cfg.set("strategy", "funding_threshold", val)
+        self._cfg_set("strategy", "funding_threshold", val)
         await update.message.reply_text(
-            self._t.t("config_cmds.threshold_set", pct=val * 100)
+            self._t.t("config_cmds.threshold_set", pct=val * 100),
+            disable_notification=True
         )
 
     @admin_only
@@ -428,18 +656,20 @@ class TelegramBot:
     async def cmd_set_leverage(self, update: Update, ctx: ContextTypes.DEFAULT_TYPE):
         val = self._parse_float(ctx.args, "levier")
         val = await self._risk.check_leverage(val)
-        self._cfg.set("strategy", "default_leverage", val)
+        self._cfg_set("strategy", "default_leverage", val)
         await update.message.reply_text(
-            self._t.t("config_cmds.leverage_set", lev=val)
+            self._t.t("config_cmds.leverage_set", lev=val),
+            disable_notification=True
         )
 
     @admin_only
     @safe_reply
     async def cmd_set_max_delta(self, update: Update, ctx: ContextTypes.DEFAULT_TYPE):
         val = self._parse_float(ctx.args, "max_delta")
-        self._cfg.set("strategy", "rebalance_delta_threshold", val)
+        self._cfg_set("strategy", "rebalance_delta_threshold", val)
         await update.message.reply_text(
-            self._t.t("config_cmds.max_delta_set", pct=val * 100)
+            self._t.t("config_cmds.max_delta_set", pct=val * 100),
+            disable_notification=True
         )
 
     @admin_only
@@ -451,10 +681,13 @@ class TelegramBot:
             )
             return
         pairs = [p.strip().upper() for p in ctx.args[0].split(",")]
-        self._cfg.set("strategy", "pairs", pairs)
-        self._cfg.set("strategy", "enabled_pairs", pairs)
+        # Deux clés modifiées → une seule écriture disque
+        with self._cfg.batch():
+            self._cfg_set("strategy", "pairs", pairs)
+            self._save_enabled_pairs(pairs)
         await update.message.reply_text(
-            self._t.t("config_cmds.pairs_set", pairs=", ".join(pairs))
+            self._t.t("config_cmds.pairs_set", pairs=", ".join(pairs)),
+            disable_notification=True
         )
 
     @admin_only
@@ -466,12 +699,13 @@ class TelegramBot:
             )
             return
         pair = ctx.args[0].upper()
-        enabled = list(self._cfg.get("strategy", "enabled_pairs") or [])
+        enabled = self._enabled_pairs()
         if pair not in enabled:
-            enabled.append(pair)
-            self._cfg.set("strategy", "enabled_pairs", enabled)
+            self._save_enabled_pairs(enabled | {pair})
         await update.message.reply_text(
-            self._t.t("config_cmds.pair_enabled", pair=pair, all=", ".join(enabled))
+            self._t.t("config_cmds.pair_enabled", pair=pair,
+                      all=", ".join(sorted(self._enabled_pairs()))),
+            disable_notification=True
         )
 
     @admin_only
@@ -483,50 +717,67 @@ class TelegramBot:
             )
             return
         pair = ctx.args[0].upper()
-        enabled = [p for p in (self._cfg.get("strategy", "enabled_pairs") or [])
-                   if p != pair]
-        self._cfg.set("strategy", "enabled_pairs", enabled)
+        self._save_enabled_pairs(self._enabled_pairs() - {pair})
         await update.message.reply_text(
-            self._t.t("config_cmds.pair_disabled", pair=pair, all=", ".join(enabled))
+            self._t.t("config_cmds.pair_disabled", pair=pair,
+                      all=", ".join(sorted(self._enabled_pairs()))),
+            disable_notification=True
         )
 
     @admin_only
     @safe_reply
     async def cmd_set_k(self, update: Update, ctx: ContextTypes.DEFAULT_TYPE):
         val = self._parse_float(ctx.args, "k")
-        self._cfg.set("strategy", "funding_zscore_k", val)
+        self._cfg_set("strategy", "funding_zscore_k", val)
         await update.message.reply_text(
-            self._t.t("config_cmds.k_set", k=val)
+            self._t.t("config_cmds.k_set", k=val),
+            disable_notification=True
         )
 
     @admin_only
     @safe_reply
     async def cmd_set_poll_interval(self, update: Update, ctx: ContextTypes.DEFAULT_TYPE):
         val = int(self._parse_float(ctx.args, "intervalle"))
-        self._cfg.set("strategy", "funding_poll_interval_seconds", val)
+        self._cfg_set("strategy", "funding_poll_interval_seconds", val)
         await update.message.reply_text(
-            self._t.t("config_cmds.poll_set", val=val)
+            self._t.t("config_cmds.poll_set", val=val),
+            disable_notification=True
         )
 
     # ── Commandes Urgence ────────────────────────────────────────────────────
 
+    async def _close_one(self, s: dict, sem: asyncio.Semaphore) -> bool:
+        """Fermer une position DN et libérer le capital wallet associé."""
+        async with sem:
+            r = await self._exec.close_delta_neutral(s["pair"])
+            if r.success and self._wallet:
+                await self._wallet.release(s["pair"], pnl=float(s.get("total_pnl", 0)))
+            return r.success
+
+    async def _close_all_active(self, summaries: list[dict]) -> tuple[int, int]:
+        """Fermer toutes les positions actives en parallèle (borné par
+        sémaphore pour respecter les rate limits de l'exchange).
+        Retourne (fermées, échouées)."""
+        active = [s for s in summaries if s.get("active")]
+        if not active:
+            return 0, 0
+        sem = asyncio.Semaphore(
+            int(self._cfg.get("strategy", "max_parallel_closes", default=4)))
+        results = await asyncio.gather(
+            *(self._close_one(s, sem) for s in active),
+            return_exceptions=True
+        )
+        closed = sum(1 for r in results if r is True)
+        return closed, len(active) - closed
+
     @admin_only
     @safe_reply
     async def cmd_close_all(self, update: Update, ctx: ContextTypes.DEFAULT_TYPE):
         t = self._t
-        await update.message.reply_text(t.t("execution.closing_all"))
+        await update.message.reply_text(self._S["closing_all"])
         summaries = await self._pos.all_summaries()
-        closed, failed = 0, 0
-        for s in summaries:
-            if s.get("active"):
-                r = await self._exec.close_delta_neutral(s["pair"])
-                if r.success:
-                    closed += 1
-                    # Libérer le capital dans le wallet
-                    if self._wallet:
-                        await self._wallet.release(s["pair"], pnl=float(s.get("total_pnl", 0)))
-                else:
-                    failed += 1
+        closed, failed = await self._close_all_active(summaries)
+        self._invalidate_dash()
         await update.message.reply_text(
             t.t("execution.closed_result", closed=closed, failed=failed)
         )
@@ -536,20 +787,19 @@ class TelegramBot:
     async def cmd_emergency_stop(self, update: Update, ctx: ContextTypes.DEFAULT_TYPE):
         t = self._t
         await update.message.reply_text(
-            t.t("execution.emergency_activated"), parse_mode="HTML"
+            self._S["emergency_activated"], parse_mode="HTML"
         )
         self._strategy.stop()
-        self._cfg.set("strategy", "active", False)
+        self._cfg_set("strategy", "active", False)
         await self._risk.trip_circuit_breaker("Arrêt d'urgence manuel via Telegram")
 
+        # Fermeture parallèle : critique ici, la fenêtre de risque se
+        # réduit de N×latence à ~1×latence
         summaries = await self._pos.all_summaries()
-        for s in summaries:
-            if s.get("active"):
-                await self._exec.close_delta_neutral(s["pair"])
-                if self._wallet:
-                    await self._wallet.release(s["pair"], pnl=float(s.get("total_pnl", 0)))
+        await self._close_all_active(summaries)
+        self._invalidate_dash()
 
-        await update.message.reply_text(t.t("execution.emergency_done"))
+        await update.message.reply_text(self._S["emergency_done"])
 
     @admin_only
     @safe_reply
@@ -563,12 +813,12 @@ class TelegramBot:
         t = self._t
         st = self._risk.status()
         r = self._cfg.risk
-        sep = t.t("dashboard.separator")
+        sep = self._sep
 
-        circuit_status = t.t("risk.circuit_open") if st["circuit_open"] else t.t("risk.circuit_closed")
+        circuit_status = self._S["circuit_open"] if st["circuit_open"] else self._S["circuit_closed"]
 
         msg = (
-            f"{t.t('risk.title')}\n{sep}\n"
+            f"{self._S['risk_title']}\n{sep}\n"
             f"{t.t('risk.circuit', status=circuit_status)}\n"
             f"{t.t('risk.raison', reason=st.get('circuit_reason', 'N/A'))}\n"
             f"{t.t('risk.equite', amount=st['current_equity'])}\n"
@@ -576,7 +826,7 @@ class TelegramBot:
             f"{t.t('risk.drawdown', dd=st['drawdown_pct'])}\n"
             f"{t.t('risk.perte_jour', amount=st['daily_loss_usd'])}\n"
             f"{sep}\n"
-            f"{t.t('risk.limites')}\n"
+            f"{self._S['risk_limites']}\n"
             f"{t.t('risk.max_dd', pct=r.get('max_drawdown_pct', 0) * 100)}\n"
             f"{t.t('risk.max_perte_jour', pct=r.get('max_daily_loss_pct', 0) * 100)}\n"
             f"{t.t('risk.max_levier', lev=r.get('max_leverage_hard', 5))}\n"
@@ -587,8 +837,12 @@ class TelegramBot:
     @admin_only
     @safe_reply
     async def cmd_help(self, update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+        await update.message.reply_text(self._help_text, parse_mode="HTML")
+
+    def _render_help(self) -> str:
+        """Construire le message /help complet (appelé une fois au setup)."""
         t = self._t
-        msg = (
+        return (
             f"{t.t('help.title')}\n\n"
             f"{t.t('help.section_control')}\n"
             f"{t.t('help.start')}\n"
@@ -617,17 +871,66 @@ class TelegramBot:
             f"{t.t('help.enable_pair')}\n"
             f"{t.t('help.disable_pair')}"
         )
-        await update.message.reply_text(msg, parse_mode="HTML")
+
+    def _render_help_btn(self) -> str:
+        """Variante courte de l'aide pour le bouton inline (rendue au setup)."""
+        t = self._t
+        return (
+            f"{t.t('help.title')}\n\n"
+            f"{t.t('help.section_control')}\n"
+            f"{t.t('help.start')}\n{t.t('help.stop')}\n"
+            f"{t.t('help.emergency')}\n{t.t('help.close_all')}\n\n"
+            f"{t.t('help.section_info')}\n"
+            f"{t.t('help.status')}\n{t.t('help.pnl')}\n"
+            f"{t.t('help.positions')}\n{t.t('help.funding')}\n\n"
+            f"{t.t('help.section_wallet')}\n"
+            f"{t.t('help.wallet_cmd')}\n{t.t('help.add_funds')}\n"
+            f"{t.t('help.remove_funds')}"
+        )
 
     # ── Claviers Inline ────────────────────────────────────────────────────
 
+    def _invalidate_kb(self):
+        """Invalider les claviers en cache (après mutation config/wallet)."""
+        self._kb_cache.clear()
+
+    def _cfg_set(self, *keys_and_value):
+        """self._cfg.set + invalidation des claviers qui affichent la config."""
+        self._cfg.set(*keys_and_value)
+        self._invalidate_kb()
+
+    def _enabled_pairs(self) -> set:
+        """Paires actives, servies depuis la mémoire entre deux resyncs.
+
+        Chaque toggle évite ainsi l'aller-retour lecture config, mais le
+        cache est re-seedé dès que Config.load()/save() a ramené un état
+        disque plus frais (génération) — une édition manuelle du fichier
+        reste donc visible ici comme dans la boucle de stratégie.
+        """
+        gen = self._cfg.generation
+        if self._enabled_cache is None or self._enabled_gen != gen:
+            self._enabled_cache = set(
+                self._cfg.get("strategy", "enabled_pairs") or [])
+            self._enabled_gen = gen
+        return self._enabled_cache
+
+    def _save_enabled_pairs(self, pairs):
+        self._cfg_set("strategy", "enabled_pairs", sorted(set(pairs)))
+        # Resynchroniser sur l'état fusionné que Config.save() a écrit
+        self._enabled_cache = set(
+            self._cfg.get("strategy", "enabled_pairs") or [])
+        self._enabled_gen = self._cfg.generation
+
     def _kb_main(self) -> InlineKeyboardMarkup:
-        """Clavier principal du dashboard."""
+        """Clavier principal du dashboard (rendu en cache jusqu'à mutation)."""
+        kb = self._kb_cache.get("main")
+        if kb is not None:
+            return kb
         is_active = self._cfg.get("strategy", "active", default=False)
         toggle = ("⏸ Stop", "btn_stop") if is_active else ("▶️ Start", "btn_start")
         notif_on = self._cfg.get("telegram", "trade_notifications", default=True)
         notif_btn = ("🔔 Notifs ON", "btn_notif") if notif_on else ("🔕 Notifs OFF", "btn_notif")
-        return InlineKeyboardMarkup([
+        kb = self._kb_cache["main"] = InlineKeyboardMarkup([
             [
                 InlineKeyboardButton("🔄 Refresh", callback_data="btn_refresh"),
                 InlineKeyboardButton("📈 PnL", callback_data="btn_pnl"),
@@ -649,17 +952,24 @@ class TelegramBot:
                 InlineKeyboardButton("🚨 Urgence", callback_data="btn_emergency"),
             ],
         ])
+        return kb
 
     def _kb_config(self) -> InlineKeyboardMarkup:
         """Sous-menu Configuration."""
         strat = self._cfg.strategy
+        cap = self._wallet.total_capital if self._wallet else strat.get("total_capital_usdt", 0)
+        cached = self._kb_cache.get("config")
+        # Le capital affiché bouge au rythme du wallet (allocations, funding
+        # de la boucle de stratégie), pas seulement des actions du bot : le
+        # cache est validé contre la valeur rendue, pas contre la config seule
+        if cached is not None and cached[0] == cap:
+            return cached[1]
         threshold = strat.get("funding_threshold", 0.0003) * 100
         leverage = strat.get("default_leverage", 2.0)
         max_delta = strat.get("rebalance_delta_threshold", 0.02) * 100
         k = strat.get("funding_zscore_k", 1.5)
         poll = strat.get("funding_poll_interval_seconds", 30)
-        cap = self._wallet.total_capital if self._wallet else strat.get("total_capital_usdt", 0)
-        return InlineKeyboardMarkup([
+        kb = InlineKeyboardMarkup([
             [InlineKeyboardButton(f"📉 Seuil : {threshold:.4f}%", callback_data="set_threshold")],
             [InlineKeyboardButton(f"⚡ Levier : {leverage}x", callback_data="set_leverage")],
             [InlineKeyboardButton(f"📐 Max delta : {max_delta:.1f}%", callback_data="set_max_delta")],
@@ -668,6 +978,8 @@ class TelegramBot:
             [InlineKeyboardButton(f"💰 Capital : ${cap:.2f}", callback_data="set_capital")],
             [InlineKeyboardButton("🔙 Retour", callback_data="btn_refresh")],
         ])
+        self._kb_cache["config"] = (cap, kb)
+        return kb
 
     def _kb_wallet(self) -> InlineKeyboardMarkup:
         """Sous-menu Wallet."""
@@ -680,8 +992,11 @@ class TelegramBot:
 
     def _kb_pairs(self) -> InlineKeyboardMarkup:
         """Sous-menu Paires — toggle enable/disable."""
+        kb = self._kb_cache.get("pairs")
+        if kb is not None:
+            return kb
         all_pairs = self._cfg.get("strategy", "pairs", default=[])
-        enabled = set(self._cfg.get("strategy", "enabled_pairs", default=[]))
+        enabled = self._enabled_pairs()
         rows = []
         for pair in all_pairs:
             if pair in enabled:
@@ -692,7 +1007,8 @@ class TelegramBot:
                 cb = f"enable_{pair}"
             rows.append([InlineKeyboardButton(label, callback_data=cb)])
         rows.append([InlineKeyboardButton("🔙 Retour", callback_data="btn_refresh")])
-        return InlineKeyboardMarkup(rows)
+        kb = self._kb_cache["pairs"] = InlineKeyboardMarkup(rows)
+        return kb
 
     # Alias pour la compatibilité
     def _build_keyboard(self) -> InlineKeyboardMarkup:
@@ -700,311 +1016,45 @@ class TelegramBot:
 
     async def _button_callback(self, update: Update,
                                 ctx: ContextTypes.DEFAULT_TYPE):
-        """Gérer les appuis sur les boutons inline."""
-        query = update.callback_query
-        await query.answer()
+        """Gérer les appuis sur les boutons inline — ack d'abord.
 
+        On acquitte le callback immédiatement puis on délègue le vrai
+        travail (I/O positions/wallet, edit_message_text) à une tâche :
+        le worker PTB est rendu au pool en quelques millisecondes au lieu
+        d'être retenu pendant toute la durée du handler.
+        """
+        query = update.callback_query
         cid = query.message.chat_id
+        # Rejet AVANT le query.answer() générique : pas d'aller-retour
+        # Telegram gaspillé pour les clics non autorisés
         if cid not in self._admin_ids:
+            now = time.monotonic()
+            if now - self._unauth_last.get(cid, 0) < 5.0:
+                return  # Déjà refusé récemment — drop silencieux
+            if len(self._unauth_last) >= 1024:
+                del self._unauth_last[next(iter(self._unauth_last))]
+            self._unauth_last[cid] = now
             await query.answer("⛔ Non autorisé.", show_alert=True)
             return
+        await query.answer()
 
-        data = query.data
-        t = self._t
+        task = asyncio.create_task(
+            self._dispatch_callback(query, cid, query.data))
+        # Référence forte : sans elle, la tâche peut être ramassée par le GC
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._bg_tasks.discard)
 
+    async def _dispatch_callback(self, query, cid, data):
+        """Corps du traitement des boutons (dispatch O(1), hors worker PTB)."""
         try:
-            # ── Navigation principale ────────────────────────────────
-            if data == "btn_refresh":
-                self._pending_input.pop(cid, None)
-                if self._dashboard:
-                    text = await self._dashboard.build()
-                else:
-                    text = t.t("bot.started")
-                await query.edit_message_text(
-                    text, parse_mode="HTML",
-                    reply_markup=self._kb_main()
-                )
-
-            elif data == "btn_pnl":
-                summaries = await self._pos.all_summaries()
-                if not summaries:
-                    await query.edit_message_text(
-                        t.t("pnl.no_positions"),
-                        reply_markup=self._kb_main()
-                    )
-                    return
-                total_pnl = await self._pos.total_pnl()
-                total_funding = await self._pos.total_funding_collected()
-                total_cap = self._wallet.total_capital if self._wallet else \
-                    self._cfg.get("strategy", "total_capital_usdt", default=1)
-                sep = t.t("dashboard.separator")
-                lines = [f"{t.t('pnl.title')}\n{sep}"]
-                for s in summaries:
-                    lines.append(t.t("pnl.pair_line",
-                                     pair=s["pair"], pnl=s["total_pnl"],
-                                     roi=s["roi_pct"], funding=s["funding_collected"]))
-                roi = total_pnl / total_cap * 100 if total_cap > 0 else 0
-                lines.append(
-                    f"{sep}\n"
-                    f"{t.t('pnl.total_pnl', amount=total_pnl)}\n"
-                    f"{t.t('pnl.total_funding', amount=total_funding)}\n"
-                    f"{t.t('pnl.portfolio_roi', pct=roi)}"
-                )
-                await query.edit_message_text(
-                    "\n".join(lines), parse_mode="HTML",
-                    reply_markup=self._kb_main()
-                )
-
-            elif data == "btn_positions":
-                summaries = await self._pos.all_summaries()
-                if not summaries:
-                    await query.edit_message_text(
-                        t.t("positions.no_positions"),
-                        reply_markup=self._kb_main()
-                    )
-                    return
-                sep = t.t("dashboard.separator")
-                lines = [f"{t.t('positions.title')}\n{sep}"]
-                for s in summaries:
-                    liq_flag = "🚨" if s.get("near_liquidation") else ""
-                    lines.append(
-                        f"<b>{s['pair']}</b> {liq_flag}\n"
-                        f"  Spot : {s['spot_size']} | Short perp : {abs(float(s['perp_size'])):.6f}\n"
-                        f"  Delta : {s['net_delta']:.6f} ({s['delta_ratio_pct']})\n"
-                        f"  Exposition : ${s['gross_exposure']:.2f}\n"
-                        f"  PnL : ${s['total_pnl']} | ROI : {s['roi_pct']}"
-                    )
-                await query.edit_message_text(
-                    "\n".join(lines), parse_mode="HTML",
-                    reply_markup=self._kb_main()
-                )
-
-            elif data == "btn_funding":
-                summaries = self._funding.all_summaries()
-                if not summaries:
-                    await query.edit_message_text(
-                        t.t("funding_msg.no_data"),
-                        reply_markup=self._kb_main()
-                    )
-                    return
-                sep = t.t("dashboard.separator")
-                lines = [f"{t.t('funding_msg.title')}\n{sep}"]
-                for s in summaries:
-                    lines.append(t.t("funding_msg.pair_line",
-                                     pair=s["pair"], rate=s["rate_pct"],
-                                     ma=f"{float(s['ma'])*100:.4f}%",
-                                     zscore=s["z_score"], ann=s["annualized_pct"]))
-                await query.edit_message_text(
-                    "\n".join(lines), parse_mode="HTML",
-                    reply_markup=self._kb_main()
-                )
-
-            elif data == "btn_risk":
-                st = self._risk.status()
-                r = self._cfg.risk
-                sep = t.t("dashboard.separator")
-                circuit_status = t.t("risk.circuit_open") if st["circuit_open"] else t.t("risk.circuit_closed")
-                msg = (
-                    f"{t.t('risk.title')}\n{sep}\n"
-                    f"{t.t('risk.circuit', status=circuit_status)}\n"
-                    f"{t.t('risk.equite', amount=st['current_equity'])}\n"
-                    f"{t.t('risk.drawdown', dd=st['drawdown_pct'])}\n"
-                    f"{t.t('risk.perte_jour', amount=st['daily_loss_usd'])}\n"
-                    f"{sep}\n"
-                    f"{t.t('risk.max_dd', pct=r.get('max_drawdown_pct', 0) * 100)}\n"
-                    f"{t.t('risk.max_levier', lev=r.get('max_leverage_hard', 5))}"
-                )
-                await query.edit_message_text(
-                    msg, parse_mode="HTML",
-                    reply_markup=self._kb_main()
-                )
-
-            elif data == "btn_start":
-                self._cfg.set("strategy", "active", True)
-                self._strategy.start()
-                if self._dashboard:
-                    text = await self._dashboard.build()
-                else:
-                    text = t.t("bot.started")
-                await query.edit_message_text(
-                    text, parse_mode="HTML",
-                    reply_markup=self._kb_main()
-                )
-
-            elif data == "btn_stop":
-                self._cfg.set("strategy", "active", False)
-                self._strategy.stop()
-                await query.edit_message_text(
-                    t.t("bot.stopped"), parse_mode="HTML",
-                    reply_markup=self._kb_main()
-                )
-
-            elif data == "btn_help":
-                msg = (
-                    f"{t.t('help.title')}\n\n"
-                    f"{t.t('help.section_control')}\n"
-                    f"{t.t('help.start')}\n{t.t('help.stop')}\n"
-                    f"{t.t('help.emergency')}\n{t.t('help.close_all')}\n\n"
-                    f"{t.t('help.section_info')}\n"
-                    f"{t.t('help.status')}\n{t.t('help.pnl')}\n"
-                    f"{t.t('help.positions')}\n{t.t('help.funding')}\n\n"
-                    f"{t.t('help.section_wallet')}\n"
-                    f"{t.t('help.wallet_cmd')}\n{t.t('help.add_funds')}\n"
-                    f"{t.t('help.remove_funds')}"
-                )
-                await query.edit_message_text(
-                    msg, parse_mode="HTML",
-                    reply_markup=self._kb_main()
-                )
-
-            elif data == "btn_notif":
-                current = self._cfg.get("telegram", "trade_notifications", default=True)
-                new_val = not current
-                self._cfg.set("telegram", "trade_notifications", new_val)
-                label = "🔔 Notifications activées" if new_val else "🔕 Notifications désactivées"
-                if self._dashboard:
-                    text = await self._dashboard.build()
-                else:
-                    text = label
-                await query.edit_message_text(
-                    text, parse_mode="HTML",
-                    reply_markup=self._kb_main()
-                )
-
-            elif data == "btn_emergency":
-                await query.edit_message_text(
-                    "🚨 <b>ARRÊT D'URGENCE ACTIVÉ</b>", parse_mode="HTML"
-                )
-                self._strategy.stop()
-                self._cfg.set("strategy", "active", False)
-                await self._risk.trip_circuit_breaker("Arrêt d'urgence via bouton")
-                summaries = await self._pos.all_summaries()
-                for s in summaries:
-                    try:
-                        await self._exec.close_delta_neutral(s["pair"])
-                        if self._wallet:
-                            await self._wallet.release(s["pair"], pnl=float(s.get("total_pnl", 0)))
-                    except Exception:
-                        pass
-                await query.message.reply_text(
-                    "🔴 Toutes les positions fermées. Bot arrêté.",
-                    reply_markup=self._kb_main()
-                )
-
-            # ── Sous-menu Config ─────────────────────────────────────
-            elif data == "menu_config":
-                self._pending_input.pop(cid, None)
-                strat = self._cfg.strategy
-                sep = t.t("dashboard.separator")
-                cap = self._wallet.total_capital if self._wallet else strat.get("total_capital_usdt", 0)
-                msg = (
-                    f"⚙️ <b>Configuration</b>\n{sep}\n"
-                    f"Appuyez sur un paramètre pour le modifier.\n"
-                    f"Envoyez ensuite la nouvelle valeur."
-                )
-                await query.edit_message_text(
-                    msg, parse_mode="HTML",
-                    reply_markup=self._kb_config()
-                )
-
-            elif data in ("set_threshold", "set_leverage", "set_max_delta",
-                          "set_k", "set_poll", "set_capital"):
-                prompts = {
-                    "set_threshold": ("Seuil de funding", "en décimal, ex: 0.00005 = 0.005%",
-                                     "strategy", "funding_threshold"),
-                    "set_leverage": ("Levier", "ex: 2.0",
-                                    "strategy", "default_leverage"),
-                    "set_max_delta": ("Seuil delta rééquilibrage", "en décimal, ex: 0.02 = 2%",
-                                     "strategy", "rebalance_delta_threshold"),
-                    "set_k": ("Z-score k", "ex: 1.5",
-                              "strategy", "funding_zscore_k"),
-                    "set_poll": ("Intervalle polling", "en secondes, ex: 30",
-                                 "strategy", "funding_poll_interval_seconds"),
-                    "set_capital": ("Capital total", "en USDT, ex: 100",
-                                   "strategy", "total_capital_usdt"),
-                }
-                label, hint, section, key = prompts[data]
-                current = self._cfg.get(section, key, default="?")
-                self._pending_input[cid] = {
-                    "param": data, "section": section, "key": key,
-                    "label": label, "msg_id": query.message.message_id,
-                }
-                await query.edit_message_text(
-                    f"✏️ <b>{label}</b>\n\n"
-                    f"Valeur actuelle : <code>{current}</code>\n"
-                    f"Envoyez la nouvelle valeur ({hint})\n\n"
-                    f"Ou appuyez sur 🔙 pour annuler.",
-                    parse_mode="HTML",
-                    reply_markup=InlineKeyboardMarkup([
-                        [InlineKeyboardButton("🔙 Annuler", callback_data="menu_config")]
-                    ])
-                )
-
-            # ── Sous-menu Wallet ─────────────────────────────────────
-            elif data == "menu_wallet":
-                self._pending_input.pop(cid, None)
-                await self._show_wallet_view(query)
-
-            elif data in ("input_add_funds", "input_remove_funds"):
-                action = "add" if data == "input_add_funds" else "remove"
-                label = "Ajouter des fonds" if action == "add" else "Retirer des fonds"
-                avail = self._wallet.available_capital if self._wallet else 0
-                self._pending_input[cid] = {
-                    "param": data, "action": action,
-                    "msg_id": query.message.message_id,
-                }
-                msg = (
-                    f"{'💵' if action == 'add' else '💸'} <b>{label}</b>\n\n"
-                    f"Capital disponible : <b>${avail:.2f}</b>\n"
-                    f"Envoyez le montant en USDT (ex: 50)\n\n"
-                    f"Ou appuyez sur 🔙 pour annuler."
-                )
-                await query.edit_message_text(
-                    msg, parse_mode="HTML",
-                    reply_markup=InlineKeyboardMarkup([
-                        [InlineKeyboardButton("🔙 Annuler", callback_data="menu_wallet")]
-                    ])
-                )
-
-            # ── Sous-menu Paires ─────────────────────────────────────
-            elif data == "menu_pairs":
-                self._pending_input.pop(cid, None)
-                enabled = self._cfg.get("strategy", "enabled_pairs", default=[])
-                all_p = self._cfg.get("strategy", "pairs", default=[])
-                sep = t.t("dashboard.separator")
-                msg = (
-                    f"📊 <b>Gestion des paires</b>\n{sep}\n"
-                    f"Actives : {', '.join(enabled) or 'Aucune'}\n"
-                    f"Total disponibles : {len(all_p)}\n\n"
-                    f"Appuyez pour activer/désactiver :"
-                )
-                await query.edit_message_text(
-                    msg, parse_mode="HTML",
-                    reply_markup=self._kb_pairs()
-                )
-
-            elif data.startswith("enable_"):
-                pair = data.replace("enable_", "")
-                enabled = list(self._cfg.get("strategy", "enabled_pairs") or [])
-                if pair not in enabled:
-                    enabled.append(pair)
-                    self._cfg.set("strategy", "enabled_pairs", enabled)
-                await query.edit_message_text(
-                    f"✅ <b>{pair}</b> activée\n\nPaires actives : {', '.join(enabled)}",
-                    parse_mode="HTML",
-                    reply_markup=self._kb_pairs()
-                )
-
-            elif data.startswith("disable_"):
-                pair = data.replace("disable_", "")
-                enabled = [p for p in (self._cfg.get("strategy", "enabled_pairs") or [])
-                           if p != pair]
-                self._cfg.set("strategy", "enabled_pairs", enabled)
-                await query.edit_message_text(
-                    f"❌ <b>{pair}</b> désactivée\n\nPaires actives : {', '.join(enabled) or 'Aucune'}",
-                    parse_mode="HTML",
-                    reply_markup=self._kb_pairs()
-                )
+            handler = self._cb_table.get(data)
+            if handler is not None:
+                await handler(query, cid, data)
+            else:
+                action, _, arg = data.partition("_")
+                fn = self._cb_prefix.get(action)
+                if fn is not None:
+                    await fn(query, cid, arg)
 
         except telegram.error.BadRequest as e:
             if "not modified" in str(e).lower():
@@ -1028,19 +1078,348 @@ class TelegramBot:
             except Exception:
                 pass
 
+    # ── Handlers des boutons (voir self._cb_table) ─────────────────────────
+
+    async def _safe_edit(self, query, text, **kwargs):
+        """editMessageText en ignorant le 400 « message is not modified ».
+
+        Éditer le message existant plutôt qu'en poster un nouveau garde le
+        clavier en contexte et évite d'encombrer le chat ; Telegram renvoie
+        une BadRequest quand le contenu est identique — on l'avale ici.
+
+        Si le contenu est identique au dernier edit de ce message précis,
+        l'appel API est sauté entièrement : le no-op ne compte même pas
+        dans la limite des 30 msg/s du bot. La clé inclut le message_id
+        (un chat a souvent plusieurs claviers) et le markup est identifié
+        par son contenu, pas par id() — un clavier reconstruit peut
+        réutiliser l'adresse mémoire d'un ancien.
+        """
+        markup = kwargs.get("reply_markup")
+        h = hash((text, markup.to_json() if markup is not None else None))
+        key = (query.message.chat_id, query.message.message_id)
+        if self._last_edit.get(key) == h:
+            return
+        try:
+            await query.edit_message_text(text, **kwargs)
+        except telegram.error.BadRequest as e:
+            if "not modified" not in str(e).lower():
+                raise
+        if len(self._last_edit) >= 1024:
+            # Borne FIFO, même garde-fou que _unauth_last
+            del self._last_edit[next(iter(self._last_edit))]
+        self._last_edit[key] = h
+
+    async def _cached_summaries(self) -> list:
+        """all_summaries() avec TTL court, partagé entre les boutons.
+
+        Une rafale de clics PnL/Positions/Urgence relit la même liste au
+        lieu de re-parcourir toutes les positions à chaque tap.
+        """
+        now = time.monotonic()
+        cached = self._summaries_cache
+        if cached is not None and now - cached[0] < self._summaries_ttl:
+            return cached[1]
+        summaries = await self._pos.all_summaries()
+        self._summaries_cache = (now, summaries)
+        return summaries
+
+    async def _cb_refresh(self, query, cid, data):
+        self._pending_input.pop(cid, None)
+        if self._dashboard:
+            text = await self._build_dashboard()
+        else:
+            text = self._S["started"]
+        await self._safe_edit(query, 
+            text, parse_mode="HTML",
+            reply_markup=self._kb_main()
+        )
+
+    async def _cb_pnl(self, query, cid, data):
+        t = self._t
+        summaries = await self._cached_summaries()
+        if not summaries:
+            await self._safe_edit(query,
+                self._S["pnl_none"],
+                reply_markup=self._kb_main()
+            )
+            return
+        # Totaux dérivés de la liste déjà en main — pas d'awaits
+        # supplémentaires qui re-parcourent les mêmes positions
+        total_pnl = sum(float(s["total_pnl"]) for s in summaries)
+        total_funding = sum(float(s["funding_collected"]) for s in summaries)
+        total_cap = self._wallet.total_capital if self._wallet else \
+            self._cfg.get("strategy", "total_capital_usdt", default=1)
+        sep = self._sep
+        # Template résolu une fois — pas de lookup traducteur par ligne
+        pair_tmpl = t.t("pnl.pair_line")
+        lines = [f"{self._S['pnl_title']}\n{sep}"]
+        append = lines.append
+        for s in summaries:
+            append(pair_tmpl.format(
+                pair=s["pair"], pnl=s["total_pnl"],
+                roi=s["roi_pct"], funding=s["funding_collected"]))
+        roi = total_pnl / total_cap * 100 if total_cap > 0 else 0
+        lines.append(
+            f"{sep}\n"
+            f"{t.t('pnl.total_pnl', amount=total_pnl)}\n"
+            f"{t.t('pnl.total_funding', amount=total_funding)}\n"
+            f"{t.t('pnl.portfolio_roi', pct=roi)}"
+        )
+        await self._safe_edit(query, 
+            "\n".join(lines), parse_mode="HTML",
+            reply_markup=self._kb_main()
+        )
+
+    async def _cb_positions(self, query, cid, data):
+        t = self._t
+        summaries = await self._cached_summaries()
+        if not summaries:
+            await self._safe_edit(query, 
+                self._S["pos_none"],
+                reply_markup=self._kb_main()
+            )
+            return
+        sep = self._sep
+        lines = [f"{self._S['pos_title']}\n{sep}"]
+        append = lines.append
+        for s in summaries:
+            append(_POS_LINE_BTN.format(
+                pair=s.get("pair_html", s["pair"]),
+                flag="🚨" if s.get("near_liquidation") else "",
+                spot=s["spot_size"], perp=abs(float(s["perp_size"])),
+                delta=s["net_delta"], ratio=s["delta_ratio_pct"],
+                exp=s["gross_exposure"], pnl=s["total_pnl"],
+                roi=s["roi_pct"]))
+        await self._safe_edit(query, 
+            "\n".join(lines), parse_mode="HTML",
+            reply_markup=self._kb_main()
+        )
+
+    async def _cb_funding(self, query, cid, data):
+        t = self._t
+        summaries = self._funding.all_summaries()
+        if not summaries:
+            await self._safe_edit(query, 
+                self._S["funding_none"],
+                reply_markup=self._kb_main()
+            )
+            return
+        sep = self._sep
+        pair_tmpl = t.t("funding_msg.pair_line")
+        lines = [f"{self._S['funding_title']}\n{sep}"]
+        append = lines.append
+        for s in summaries:
+            append(pair_tmpl.format(
+                pair=s["pair"], rate=s["rate_pct"],
+                ma=s["ma_pct_str"],
+                zscore=s["z_score"], ann=s["annualized_pct"]))
+        await self._safe_edit(query, 
+            "\n".join(lines), parse_mode="HTML",
+            reply_markup=self._kb_main()
+        )
+
+    async def _cb_risk(self, query, cid, data):
+        t = self._t
+        st = self._risk.status()
+        r = self._cfg.risk
+        sep = self._sep
+        circuit_status = self._S["circuit_open"] if st["circuit_open"] else self._S["circuit_closed"]
+        msg = (
+            f"{self._S['risk_title']}\n{sep}\n"
+            f"{t.t('risk.circuit', status=circuit_status)}\n"
+            f"{t.t('risk.equite', amount=st['current_equity'])}\n"
+            f"{t.t('risk.drawdown', dd=st['drawdown_pct'])}\n"
+            f"{t.t('risk.perte_jour', amount=st['daily_loss_usd'])}\n"
+            f"{sep}\n"
+            f"{t.t('risk.max_dd', pct=r.get('max_drawdown_pct', 0) * 100)}\n"
+            f"{t.t('risk.max_levier', lev=r.get('max_leverage_hard', 5))}"
+        )
+        await self._safe_edit(query, 
+            msg, parse_mode="HTML",
+            reply_markup=self._kb_main()
+        )
+
+    async def _cb_start(self, query, cid, data):
+        self._cfg_set("strategy", "active", True)
+        self._strategy.start()
+        self._invalidate_dash()
+        if self._dashboard:
+            text = await self._build_dashboard()
+        else:
+            text = self._S["started"]
+        await self._safe_edit(query, 
+            text, parse_mode="HTML",
+            reply_markup=self._kb_main()
+        )
+
+    async def _cb_stop(self, query, cid, data):
+        self._cfg_set("strategy", "active", False)
+        self._strategy.stop()
+        self._invalidate_dash()
+        await self._safe_edit(query, 
+            self._S["stopped"], parse_mode="HTML",
+            reply_markup=self._kb_main()
+        )
+
+    async def _cb_help(self, query, cid, data):
+        await self._safe_edit(query,
+            self._help_btn_text, parse_mode="HTML",
+            reply_markup=self._kb_main()
+        )
+
+    async def _cb_notif(self, query, cid, data):
+        current = self._cfg.get("telegram", "trade_notifications", default=True)
+        new_val = not current
+        self._cfg_set("telegram", "trade_notifications", new_val)
+        label = "🔔 Notifications activées" if new_val else "🔕 Notifications désactivées"
+        if self._dashboard:
+            text = await self._build_dashboard()
+        else:
+            text = label
+        await self._safe_edit(query, 
+            text, parse_mode="HTML",
+            reply_markup=self._kb_main()
+        )
+
+    async def _cb_emergency(self, query, cid, data):
+        await self._safe_edit(query, 
+            "🚨 <b>ARRÊT D'URGENCE ACTIVÉ</b>", parse_mode="HTML"
+        )
+        self._strategy.stop()
+        self._cfg_set("strategy", "active", False)
+        await self._risk.trip_circuit_breaker("Arrêt d'urgence via bouton")
+        self._invalidate_dash()
+        # Fermetures en parallèle (voir _close_all_active) : le chemin
+        # panique passe de N allers-retours séquentiels à ~1
+        summaries = await self._cached_summaries()
+        await self._close_all_active(summaries)
+        await query.message.reply_text(
+            "🔴 Toutes les positions fermées. Bot arrêté.",
+            reply_markup=self._kb_main()
+        )
+
+    async def _cb_menu_config(self, query, cid, data):
+        self._pending_input.pop(cid, None)
+        sep = self._sep
+        msg = (
+            f"⚙️ <b>Configuration</b>\n{sep}\n"
+            f"Appuyez sur un paramètre pour le modifier.\n"
+            f"Envoyez ensuite la nouvelle valeur."
+        )
+        await self._safe_edit(query, 
+            msg, parse_mode="HTML",
+            reply_markup=self._kb_config()
+        )
+
+    def _set_pending(self, cid, entry: dict):
+        """Enregistrer une saisie en attente (purge TTL + cap de taille)."""
+        now = time.monotonic()
+        entry["ts"] = now
+        pending = self._pending_input
+        if len(pending) >= self._pending_max:
+            for c in [c for c, e in pending.items()
+                      if now - e["ts"] > self._pending_ttl]:
+                del pending[c]
+            # Toujours plein ? On évince les plus anciennes (ordre d'insertion)
+            while len(pending) >= self._pending_max:
+                del pending[next(iter(pending))]
+        pending[cid] = entry
+
+    async def _cb_set_param(self, query, cid, data):
+        label, hint, section, key = self._SET_PROMPTS[data]
+        current = self._cfg.get(section, key, default="?")
+        self._set_pending(cid, {
+            "param": data, "section": section, "key": key,
+            "label": label, "msg_id": query.message.message_id,
+        })
+        await self._safe_edit(query, 
+            f"✏️ <b>{label}</b>\n\n"
+            f"Valeur actuelle : <code>{current}</code>\n"
+            f"Envoyez la nouvelle valeur ({hint})\n\n"
+            f"Ou appuyez sur 🔙 pour annuler.",
+            parse_mode="HTML",
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("🔙 Annuler", callback_data="menu_config")]
+            ])
+        )
+
+    async def _cb_menu_wallet(self, query, cid, data):
+        self._pending_input.pop(cid, None)
+        await self._show_wallet_view(query)
+
+    async def _cb_input_funds(self, query, cid, data):
+        action = "add" if data == "input_add_funds" else "remove"
+        label = "Ajouter des fonds" if action == "add" else "Retirer des fonds"
+        avail = self._wallet.available_capital if self._wallet else 0
+        self._set_pending(cid, {
+            "param": data, "action": action,
+            "msg_id": query.message.message_id,
+        })
+        msg = (
+            f"{'💵' if action == 'add' else '💸'} <b>{label}</b>\n\n"
+            f"Capital disponible : <b>${avail:.2f}</b>\n"
+            f"Envoyez le montant en USDT (ex: 50)\n\n"
+            f"Ou appuyez sur 🔙 pour annuler."
+        )
+        await self._safe_edit(query, 
+            msg, parse_mode="HTML",
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("🔙 Annuler", callback_data="menu_wallet")]
+            ])
+        )
+
+    async def _cb_menu_pairs(self, query, cid, data):
+        self._pending_input.pop(cid, None)
+        enabled = sorted(self._enabled_pairs())
+        all_p = self._cfg.get("strategy", "pairs", default=[])
+        sep = self._sep
+        msg = (
+            f"📊 <b>Gestion des paires</b>\n{sep}\n"
+            f"Actives : {', '.join(enabled) or 'Aucune'}\n"
+            f"Total disponibles : {len(all_p)}\n\n"
+            f"Appuyez pour activer/désactiver :"
+        )
+        await self._safe_edit(query, 
+            msg, parse_mode="HTML",
+            reply_markup=self._kb_pairs()
+        )
+
+    async def _cb_enable_pair(self, query, cid, pair):
+        enabled = self._enabled_pairs()
+        if pair not in enabled:
+            self._save_enabled_pairs(enabled | {pair})
+        await self._safe_edit(query,
+            f"✅ <b>{pair}</b> activée\n\n"
+            f"Paires actives : {', '.join(sorted(self._enabled_pairs()))}",
+            parse_mode="HTML",
+            reply_markup=self._kb_pairs()
+        )
+
+    async def _cb_disable_pair(self, query, cid, pair):
+        self._save_enabled_pairs(self._enabled_pairs() - {pair})
+        await self._safe_edit(query,
+            f"❌ <b>{pair}</b> désactivée\n\n"
+            f"Paires actives : {', '.join(sorted(self._enabled_pairs())) or 'Aucune'}",
+            parse_mode="HTML",
+            reply_markup=self._kb_pairs()
+        )
+
     async def _show_wallet_view(self, query):
         """Afficher la vue wallet avec boutons."""
         t = self._t
         if not self._wallet:
-            await query.edit_message_text(
+            await self._safe_edit(query, 
                 "❌ Module wallet non configuré.",
                 reply_markup=self._kb_main()
             )
             return
+        # L'exposition part en tâche pendant que le snapshot (synchrone)
+        # se calcule — les deux se recouvrent au lieu de se suivre
+        exposure_task = asyncio.create_task(self._pos.total_exposure())
         w = self._wallet.snapshot()
-        exposure = await self._pos.total_exposure()
+        exposure = await exposure_task
         avg_lev = self._wallet.get_average_leverage(exposure)
-        sep = t.t("dashboard.separator")
+        sep = self._sep
         lines = [
             t.t("wallet.title"), sep,
             t.t("wallet.capital_total", amount=w["total_capital"]),
@@ -1054,14 +1433,18 @@ class TelegramBot:
             t.t("wallet.exposition_totale", amount=exposure),
             t.t("wallet.levier_moyen", lev=avg_lev),
         ]
-        await query.edit_message_text(
+        await self._safe_edit(query, 
             "\n".join(lines), parse_mode="HTML",
             reply_markup=self._kb_wallet()
         )
 
     async def _handle_text_input(self, update: Update,
                                   ctx: ContextTypes.DEFAULT_TYPE):
-        """Recevoir la valeur tapée par l'utilisateur pour un paramètre."""
+        """Recevoir la valeur tapée par l'utilisateur pour un paramètre.
+
+        Même pattern « ack d'abord » que les boutons : les checks sont
+        synchrones, le traitement (wallet, config, replies) part en tâche.
+        """
         cid = update.effective_chat.id
         if cid not in self._admin_ids:
             return
@@ -1069,6 +1452,29 @@ class TelegramBot:
             return  # Pas en mode saisie
 
         pending = self._pending_input.pop(cid)
+        if time.monotonic() - pending.get("ts", 0) > self._pending_ttl:
+            return  # Invite expirée — on ignore la saisie tardive
+        task = asyncio.create_task(self._process_text_input(update, pending))
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._bg_tasks.discard)
+
+    async def _process_text_input(self, update: Update, pending: dict):
+        """Appliquer la valeur saisie (corps exécuté hors worker PTB).
+
+        Les erreurs sont renvoyées dans le chat : une exception dans une
+        tâche détachée ne remonterait sinon nulle part.
+        """
+        try:
+            await self._apply_text_input(update, pending)
+        except Exception as e:
+            logger.exception(f"Erreur saisie texte : {e}")
+            try:
+                await update.message.reply_text(
+                    self._t.t("bot.error", error=str(e)))
+            except Exception:
+                pass
+
+    async def _apply_text_input(self, update: Update, pending: dict):
         text = update.message.text.strip()
 
         try:
@@ -1097,7 +1503,7 @@ class TelegramBot:
             elif param == "set_capital" and self._wallet:
                 await self._wallet.set_capital(val)
 
-            self._cfg.set(section, key, val)
+            self._cfg_set(section, key, val)
 
             await update.message.reply_text(
                 f"✅ <b>{label}</b> → <code>{val}</code>",
@@ -1109,6 +1515,7 @@ class TelegramBot:
         elif param == "input_add_funds":
             if self._wallet:
                 await self._wallet.add_funds(val)
+                self._invalidate_kb()
                 await update.message.reply_text(
                     f"✅ <b>${val:.2f}</b> ajoutés\n"
                     f"Capital total : <b>${self._wallet.total_capital:.2f}</b>",
@@ -1121,6 +1528,7 @@ class TelegramBot:
         elif param == "input_remove_funds":
             if self._wallet:
                 success = await self._wallet.remove_funds(val)
+                self._invalidate_kb()
                 if success:
                     await update.message.reply_text(
                         f"✅ <b>${val:.2f}</b> retirés\n"
@@ -1137,11 +1545,13 @@ class TelegramBot:
                 await update.message.reply_text("❌ Module wallet non configuré.")
 
     def _parse_float(self, args, name: str) -> float:
-        t = self._t
         if not args:
-            raise ValueError(t.t("config_cmds.missing_value", name=name))
-        try:
-            return float(args[0])
-        except ValueError:
-            raise ValueError(t.t("config_cmds.invalid_value", name=name, val=args[0]))
+            raise ValueError(self._t.t("config_cmds.missing_value", name=name))
+        # Virgule décimale acceptée (claviers FR), validation par regex
+        # pré-compilée plutôt que try/except ValueError
+        s = args[0].replace(",", ".")
+        if not _FLOAT_RE.match(s):
+            raise ValueError(
+                self._t.t("config_cmds.invalid_value", name=name, val=args[0]))
+        return float(s)
 
@@ -267,9 +267,11 @@ class DeltaNeutralStrategy:
         threshold = self._cfg.get("strategy", "rebalance_delta_threshold",
                                   default=0.02)
         pairs = await self._pos.get_pairs_needing_rebalance(threshold)
-        for pair in pairs:
-            logger.info(f"[{pair}] Rééquilibrage du delta")
-            result = await self._exec.rebalance(pair)
+        if not pairs:
+            return
+        logger.info(f"Rééquilibrage du delta : {', '.join(pairs)}")
+        results = await self._exec.rebalance_all(pairs)
+        for pair, result in zip(pairs, results):
             if result.success:
                 await self._alert(f"⚖️ Delta rééquilibré : {pair}")
 
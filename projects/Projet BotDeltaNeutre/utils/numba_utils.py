@@ -0,0 +1,44 @@
+"""
+utils/numba_utils.py - Noyaux numériques compilés pour la boucle de trading.
+Numba est optionnel : sans lui, les fonctions tournent en Python/NumPy pur.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # Fallback : décorateur no-op quand Numba n'est pas installé
+    def njit(*args, **kwargs):
+        def wrap(fn):
+            return fn
+        if args and callable(args[0]):
+            return args[0]
+        return wrap
+
+
+@njit(cache=True)
+def rebal_plan(deltas: np.ndarray, eps: float):
+    """Plan de rééquilibrage vectorisé sur toutes les paires actives.
+
+    Pour chaque delta net : side (0 = ask/vendre, 1 = bid/racheter),
+    qty (= |delta|) et flag reduce_only. Les deltas sous eps sont
+    ignorés (qty = 0).
+    """
+    n = deltas.shape[0]
+    sides = np.zeros(n, dtype=np.int8)
+    qtys = np.zeros(n, dtype=np.float64)
+    reduces = np.zeros(n, dtype=np.bool_)
+    for i in range(n):
+        d = deltas[i]
+        if abs(d) < eps:
+            continue
+        qtys[i] = abs(d)
+        if d > 0:
+            # Trop long → vendre plus de perp short
+            sides[i] = 0
+        else:
+            # Trop short → racheter du perp short
+            sides[i] = 1
+            reduces[i] = True
+    return sides, qtys, reduces
@@ -6,10 +6,20 @@ Suivi du capital, allocation par paire, funding cumulé, persistance JSON.
 import asyncio
 import json
 import logging
+import os
+import time
+from collections import deque
 from datetime import datetime
 from pathlib import Path
+from types import MappingProxyType
 from typing import Optional
 
+try:
+    # Sérialisation JSON nettement plus rapide que le module standard
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,55 +31,114 @@ class WalletManager:
     Persiste l'état dans un fichier JSON pour survivre aux redémarrages.
     """
 
+    # Montants stockés en entiers (1 unité = 1/10000 USD) : arithmétique
+    # déterministe, pas de dérive d'arrondi flottant sur un bot qui tourne
+    # des semaines
+    _SCALE = 10_000
+
     def __init__(self, state_file: str = "data/wallet_state.json",
                  initial_capital: float = 10000.0):
         self._state_file = Path(state_file)
         self._lock = asyncio.Lock()
 
         # Valeurs par défaut
-        self.initial_capital: float = initial_capital
-        self.total_capital: float = initial_capital
-        self.available_capital: float = initial_capital
-        self.committed_capital: float = 0.0
-        self.accumulated_funding: float = 0.0
-        self.realized_pnl: float = 0.0
-        self.unrealized_pnl: float = 0.0
+        self._initial_units: int = self._to_units(initial_capital)
+        self._total_units: int = self._initial_units
+        self._available_units: int = self._initial_units
+        self._committed_units: int = 0
+        self._funding_units: int = 0
+        self._realized_units: int = 0
+        self._unrealized_units: int = 0
         self._allocations: dict[str, float] = {}
-        self._history: list[dict] = []
+        # Vue en lecture seule sur les allocations : évite de copier le
+        # dict à chaque consultation
+        self._alloc_view = MappingProxyType(self._allocations)
+        # Les 500 dernières entrées ; l'éviction des plus anciennes est
+        # automatique, sans re-slicing de liste
+        self._history: deque[dict] = deque(maxlen=500)
+
+        # Écriture différée : les mutations marquent l'état "dirty" et une
+        # tâche de fond regroupe les sauvegardes rapprochées en une seule
+        self._dirty = asyncio.Event()
+        self._writer_task: Optional[asyncio.Task] = None
+        self._flush_delay = 0.1
+
+        # Snapshot mémoïsé : le dashboard interroge bien plus souvent que
+        # l'état ne change, on ne reconstruit le dict qu'après une mutation
+        self._snapshot_cache: Optional[dict] = None
 
         # Charger l'état persisté s'il existe
         self._load()
 
     # ── Gestion du capital ──────────────────────────────────────────────────
 
+    @staticmethod
+    def _to_units(amount: float) -> int:
+        """Convertir un montant USD en unités internes entières."""
+        return int(round(amount * WalletManager._SCALE))
+
+    # Les champs monétaires restent exposés en float pour les lecteurs
+    # (dashboard, stratégie) ; seule la représentation interne change
+
+    @property
+    def initial_capital(self) -> float:
+        return self._initial_units / self._SCALE
+
+    @property
+    def total_capital(self) -> float:
+        return self._total_units / self._SCALE
+
+    @property
+    def available_capital(self) -> float:
+        return self._available_units / self._SCALE
+
+    @property
+    def committed_capital(self) -> float:
+        return self._committed_units / self._SCALE
+
+    @property
+    def accumulated_funding(self) -> float:
+        return self._funding_units / self._SCALE
+
+    @property
+    def realized_pnl(self) -> float:
+        return self._realized_units / self._SCALE
+
+    @property
+    def unrealized_pnl(self) -> float:
+        return self._unrealized_units / self._SCALE
+
     async def set_capital(self, amount: float):
         """Définir le capital initial et réinitialiser le portefeuille."""
         async with self._lock:
-            self.initial_capital = amount
-            self.total_capital = amount + self.accumulated_funding + self.realized_pnl
-            self.available_capital = self.total_capital - self.committed_capital
+            self._initial_units = self._to_units(amount)
+            self._total_units = (self._initial_units + self._funding_units
+                                 + self._realized_units)
+            self._available_units = self._total_units - self._committed_units
             self._add_history("set_capital", amount)
-            self._save()
+            self._mark_dirty()
 
     async def add_funds(self, amount: float):
         """Ajouter des fonds au portefeuille."""
         async with self._lock:
-            self.total_capital += amount
-            self.available_capital += amount
-            self.initial_capital += amount
+            units = self._to_units(amount)
+            self._total_units += units
+            self._available_units += units
+            self._initial_units += units
             self._add_history("add_funds", amount)
-            self._save()
+            self._mark_dirty()
 
     async def remove_funds(self, amount: float) -> bool:
         """Retirer des fonds du portefeuille. Retourne False si insuffisant."""
         async with self._lock:
-            if amount > self.available_capital:
+            units = self._to_units(amount)
+            if units > self._available_units:
                 return False
-            self.total_capital -= amount
-            self.available_capital -= amount
-            self.initial_capital -= amount
+            self._total_units -= units
+            self._available_units -= units
+            self._initial_units -= units
             self._add_history("remove_funds", -amount)
-            self._save()
+            self._mark_dirty()
             return True
 
     # ── Allocation par paire ────────────────────────────────────────────────
@@ -84,34 +153,38 @@ class WalletManager:
         Retourne False si capital insuffisant.
         """
         async with self._lock:
-            if amount > self.available_capital:
+            units = self._to_units(amount)
+            if units > self._available_units:
                 return False
-            self.available_capital -= amount
-            self.committed_capital += amount
+            self._available_units -= units
+            self._committed_units += units
             self._allocations[pair] = self._allocations.get(pair, 0.0) + amount
             self._add_history("allocate", amount, pair=pair)
-            self._save()
+            self._mark_dirty()
             return True
 
     async def release(self, pair: str, pnl: float = 0.0):
         """Libérer le capital d'une paire avec le PnL réalisé."""
         async with self._lock:
             allocated = self._allocations.pop(pair, 0.0)
-            self.committed_capital -= allocated
-            self.realized_pnl += pnl
+            alloc_units = self._to_units(allocated)
+            pnl_units = self._to_units(pnl)
+            self._committed_units -= alloc_units
+            self._realized_units += pnl_units
             returned = allocated + pnl
-            self.available_capital += returned
-            self.total_capital += pnl
+            self._available_units += alloc_units + pnl_units
+            self._total_units += pnl_units
             self._add_history("release", returned, pair=pair, pnl=pnl)
-            self._save()
+            self._mark_dirty()
 
     async def record_funding(self, pair: str, amount: float):
         """Enregistrer le funding collecté."""
         async with self._lock:
-            self.accumulated_funding += amount
-            self.total_capital += amount
-            self.available_capital += amount
-            self._save()
+            units = self._to_units(amount)
+            self._funding_units += units
+            self._total_units += units
+            self._available_units += units
+            self._mark_dirty()
 
     # ── Vérifications Risk ──────────────────────────────────────────────────
 
@@ -133,7 +206,8 @@ class WalletManager:
     @property
     def total_pnl(self) -> float:
         """PnL total = réalisé + non réalisé + funding."""
-        return self.realized_pnl + self.unrealized_pnl + self.accumulated_funding
+        return (self._realized_units + self._unrealized_units
+                + self._funding_units) / self._SCALE
 
     @property
     def roi_pct(self) -> float:
@@ -147,9 +221,9 @@ class WalletManager:
         return self._allocations.get(pair, 0.0)
 
     @property
-    def allocations(self) -> dict[str, float]:
-        """Copie des allocations par paire."""
-        return dict(self._allocations)
+    def allocations(self) -> MappingProxyType:
+        """Vue en lecture seule des allocations par paire."""
+        return self._alloc_view
 
     def get_average_leverage(self, total_exposure: float) -> float:
         """Calculer le levier moyen."""
@@ -161,7 +235,9 @@ class WalletManager:
 
     def snapshot(self) -> dict:
         """Retourne un dictionnaire de l'état complet du portefeuille."""
-        return {
+        if self._snapshot_cache is not None:
+            return self._snapshot_cache
+        self._snapshot_cache = {
             "initial_capital": round(self.initial_capital, 2),
             "total_capital": round(self.total_capital, 2),
             "available_capital": round(self.available_capital, 2),
@@ -174,53 +250,134 @@ class WalletManager:
             "allocations": dict(self._allocations),
             "num_allocations": len(self._allocations),
         }
+        return self._snapshot_cache
 
     async def update_unrealized_pnl(self, unrealized: float):
-        """Mettre à jour le PnL non réalisé (depuis les positions ouvertes)."""
-        async with self._lock:
-            self.unrealized_pnl = unrealized
+        """Mettre à jour le PnL non réalisé (depuis les positions ouvertes).
+
+        Seule une affectation d'attribut, atomique sous le GIL : pas besoin
+        du lock sur ce chemin appelé à la fréquence des données de marché.
+        """
+        self._unrealized_units = self._to_units(unrealized)
+        self._snapshot_cache = None
 
     # ── Historique ──────────────────────────────────────────────────────────
 
+    @staticmethod
+    def _iso(ns: int) -> str:
+        """Convertit un horodatage time_ns en chaîne ISO (affichage uniquement)."""
+        return datetime.utcfromtimestamp(ns / 1e9).isoformat()
+
     def _add_history(self, action: str, amount: float, **extra):
-        entry = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "action": action,
-            "amount": round(amount, 4),
-            "total_capital": round(self.total_capital, 2),
-            "available": round(self.available_capital, 2),
-            "committed": round(self.committed_capital, 2),
-        }
+        # Quand le deque est plein, recycler le dict le plus ancien au lieu
+        # d'en allouer un neuf : zéro allocation en régime permanent
+        if len(self._history) == self._history.maxlen:
+            entry = self._history.popleft()
+            entry.clear()
+        else:
+            entry = {}
+        # Horodatage entier : le formatage ISO n'est fait qu'à la lecture
+        entry["ts_ns"] = time.time_ns()
+        entry["action"] = action
+        entry["amount"] = round(amount, 4)
+        entry["total_capital"] = round(self.total_capital, 2)
+        entry["available"] = round(self.available_capital, 2)
+        entry["committed"] = round(self.committed_capital, 2)
         entry.update(extra)
         self._history.append(entry)
-        # Garder les 500 dernières entrées
-        if len(self._history) > 500:
-            self._history = self._history[-500:]
 
     @property
     def history(self) -> list[dict]:
-        return list(self._history)
+        return [{**e, "timestamp": self._iso(e["ts_ns"])} for e in self._history]
 
     # ── Persistance ─────────────────────────────────────────────────────────
 
+    def _mark_dirty(self):
+        """Planifier une sauvegarde différée au lieu d'écrire immédiatement."""
+        self._snapshot_cache = None
+        self._dirty.set()
+        if self._writer_task is None or self._writer_task.done():
+            try:
+                self._writer_task = asyncio.get_running_loop().create_task(
+                    self._writer_loop())
+            except RuntimeError:
+                # Pas de boucle active (usage synchrone) : écrire directement
+                self._dirty.clear()
+                self._save()
+
+    async def _writer_loop(self):
+        """Tâche de fond : attend une mutation puis laisse passer un court
+        délai pour regrouper les écritures en rafale avant de sauvegarder."""
+        while True:
+            await self._dirty.wait()
+            await asyncio.sleep(self._flush_delay)
+            self._dirty.clear()
+            # Construire le dict sur la boucle (rapide), écrire dans un
+            # thread pour ne pas bloquer l'event loop sur le disque
+            state = self._build_state_dict()
+            await asyncio.to_thread(self._save_sync, state)
+
+    async def close(self):
+        """Arrêter la tâche d'écriture et vider la sauvegarde en attente."""
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            self._writer_task = None
+        if self._dirty.is_set():
+            self._dirty.clear()
+            await asyncio.to_thread(self._save_sync, self._build_state_dict())
+
+    def _build_state_dict(self) -> dict:
+        """Construire le dict d'état à persister (rapide, sans IO)."""
+        return {
+            "initial_capital": self.initial_capital,
+            "total_capital": self.total_capital,
+            "available_capital": self.available_capital,
+            "committed_capital": self.committed_capital,
+            "accumulated_funding": self.accumulated_funding,
+            "realized_pnl": self.realized_pnl,
+            "unrealized_pnl": self.unrealized_pnl,
+            "allocations": dict(self._allocations),
+            # Copies : les dicts du deque sont recyclés et pourraient être
+            # réécrits pendant la sérialisation dans le thread d'écriture
+            "history": [dict(e) for e in list(self._history)[-100:]],
+            "last_saved": self._iso(time.time_ns()),
+        }
+
     def _save(self):
-        """Sauvegarder l'état dans un fichier JSON."""
+        """Sauvegarder l'état dans un fichier JSON (chemin synchrone)."""
+        self._save_sync(self._build_state_dict())
+
+    def _save_sync(self, state: dict):
+        """Sérialiser et écrire l'état sur disque (bloquant, appelable
+        depuis un thread via asyncio.to_thread).
+
+        Note : pour un déploiement multi-instruments avec un WalletManager
+        par marché, les écritures pourraient être regroupées au niveau
+        kernel (io_uring). Avec un seul portefeuille et l'écrivain différé
+        ci-dessus, le volume d'écritures est déjà ramené à quelques-unes
+        par seconde au pire ; une dépendance à liburing ne se justifie pas.
+        """
         try:
             self._state_file.parent.mkdir(parents=True, exist_ok=True)
-            state = {
-                "initial_capital": self.initial_capital,
-                "total_capital": self.total_capital,
-                "available_capital": self.available_capital,
-                "committed_capital": self.committed_capital,
-                "accumulated_funding": self.accumulated_funding,
-                "realized_pnl": self.realized_pnl,
-                "unrealized_pnl": self.unrealized_pnl,
-                "allocations": self._allocations,
-                "history": self._history[-100:],  # Garder les 100 dernières
-                "last_saved": datetime.utcnow().isoformat(),
-            }
-            with open(self._state_file, "w", encoding="utf-8") as f:
-                json.dump(state, f, indent=2, ensure_ascii=False)
+            # Sérialiser d'abord en mémoire (format compact), puis une seule
+            # écriture au lieu des nombreux petits write() de json.dump
+            if orjson is not None:
+                data = orjson.dumps(state)
+            else:
+                data = json.dumps(state, separators=(",", ":"),
+                                  ensure_ascii=False).encode("utf-8")
+            # Écriture atomique : fichier temporaire + fsync + rename, un
+            # crash en cours d'écriture ne peut pas corrompre l'état
+            tmp = self._state_file.with_suffix(".json.tmp")
+            with open(tmp, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self._state_file)
         except Exception as e:
             logger.error(f"Erreur sauvegarde wallet : {e}")
 
@@ -230,17 +387,35 @@ class WalletManager:
             logger.info("Aucun état wallet trouvé, utilisation des valeurs par défaut")
             return
         try:
-            with open(self._state_file, "r", encoding="utf-8") as f:
-                state = json.load(f)
-            self.initial_capital = state.get("initial_capital", self.initial_capital)
-            self.total_capital = state.get("total_capital", self.total_capital)
-            self.available_capital = state.get("available_capital", self.available_capital)
-            self.committed_capital = state.get("committed_capital", self.committed_capital)
-            self.accumulated_funding = state.get("accumulated_funding", 0.0)
-            self.realized_pnl = state.get("realized_pnl", 0.0)
-            self.unrealized_pnl = state.get("unrealized_pnl", 0.0)
+            if orjson is not None:
+                state = orjson.loads(self._state_file.read_bytes())
+            else:
+                with open(self._state_file, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            # L'état JSON reste en float (format inchangé) ; conversion en
+            # unités entières au chargement
+            self._initial_units = self._to_units(
+                state.get("initial_capital", self.initial_capital))
+            self._total_units = self._to_units(
+                state.get("total_capital", self.total_capital))
+            self._available_units = self._to_units(
+                state.get("available_capital", self.available_capital))
+            self._committed_units = self._to_units(
+                state.get("committed_capital", self.committed_capital))
+            self._funding_units = self._to_units(state.get("accumulated_funding", 0.0))
+            self._realized_units = self._to_units(state.get("realized_pnl", 0.0))
+            self._unrealized_units = self._to_units(state.get("unrealized_pnl", 0.0))
             self._allocations = state.get("allocations", {})
-            self._history = state.get("history", [])
+            self._alloc_view = MappingProxyType(self._allocations)
+            hist = []
+            for e in state.get("history", []):
+                if "ts_ns" not in e and "timestamp" in e:
+                    # Migration des anciens états avec horodatage ISO
+                    e = dict(e)
+                    e["ts_ns"] = int(datetime.fromisoformat(
+                        e.pop("timestamp")).timestamp() * 1e9)
+                hist.append(e)
+            self._history = deque(hist, maxlen=500)
             logger.info(f"État wallet chargé : capital={self.total_capital:.2f}, "
                         f"disponible={self.available_capital:.2f}")
         except Exception as e:
@@ -59,9 +59,15 @@ R = R.dropna() #Supprime les éléments NaN
 r = r.dropna()
 
 #Calcul du nombre d'observation, la moyenne, la variance, ecart-type, quantiles de R et r
+#Un seul np.quantile par série donne les 5 quantiles d'un coup (un seul tri),
+#au lieu de 5 appels .quantile qui re-parcourent chacun toute la série
 
-n, rmoy, rv, rsigma, rquant5, rquant25, rquant50, rquant75, rquant95  = len(r), r.mean(), r.var(), r.std(), r.quantile(0.05), r.quantile(0.25), r.quantile(0.50), r.quantile(0.75), r.quantile(0.95)
-N, Rmoy, Rv, Rsigma, Rquant5, Rquant25, Rquant50, Rquant75, Rquant95  = len(R), R.mean(), R.var(), R.std(), R.quantile(0.05), R.quantile(0.25), R.quantile(0.50), R.quantile(0.75), R.quantile(0.95)
+r_arr = r.to_numpy(dtype=np.float64).ravel()
+R_arr = R.to_numpy(dtype=np.float64).ravel()
+n, rmoy, rv, rsigma = len(r_arr), r_arr.mean(), r_arr.var(ddof=1), r_arr.std(ddof=1)
+rquant5, rquant25, rquant50, rquant75, rquant95 = np.quantile(r_arr, [0.05, 0.25, 0.50, 0.75, 0.95])
+N, Rmoy, Rv, Rsigma = len(R_arr), R_arr.mean(), R_arr.var(ddof=1), R_arr.std(ddof=1)
+Rquant5, Rquant25, Rquant50, Rquant75, Rquant95 = np.quantile(R_arr, [0.05, 0.25, 0.50, 0.75, 0.95])
 
 print("Nombre d'observations : ", n)
 print("Moyenne des rendements logarithmiques : ", rmoy)
@@ -112,8 +118,17 @@ r_series = r.squeeze().dropna()
 max_lag = 150
 lags = range(1, max_lag + 1)
 
+
+def acf(x, max_lag):
+    """ACF vectorisée : tous les lags d'un coup via np.correlate (code C),
+    au lieu d'un appel pandas autocorr par lag qui re-parcourt la série."""
+    xc = x - x.mean()
+    full = np.correlate(xc, xc, mode="full") / (xc.var() * len(xc))
+    return full[len(xc):len(xc) + max_lag]
+
+
 # Graphique 4 : ACF des rendements logarithmiques
-acf_vals_r = [r_series.autocorr(lag=k) for k in lags]
+acf_vals_r = acf(r_series.to_numpy(dtype=np.float64), max_lag)
 
 n = len(r_series.dropna())
 borne = 1.96 / np.sqrt(n)
@@ -137,7 +152,7 @@ plt.show()
 
 # Graphique 5 : ACF des rendements logarithmiques au carré
 r2_series = (r_series ** 2).dropna()
-acf_vals_r2 = [r2_series.autocorr(lag=k) for k in lags]
+acf_vals_r2 = acf(r2_series.to_numpy(dtype=np.float64), max_lag)
 
 # Taille d'échantillon pour l'IC asymptotique de l'ACF
 n = len(r2_series)
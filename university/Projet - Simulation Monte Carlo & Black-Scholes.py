@@ -1,8 +1,37 @@
+import math
+import os
+
 import numpy as np
 import numpy.random as rd
+import matplotlib
+if os.environ.get("BATCH"):
+    #Exécution sans écran : le backend Agg évite toute initialisation GUI
+    matplotlib.use("Agg")
 from matplotlib import pyplot as plt
 from scipy.stats import norm
 
+try:
+    #Numba est optionnel : si présent, le coeur Monte Carlo tourne dans une
+    #boucle compilée parallèle ; sinon on garde le chemin NumPy vectorisé
+    from numba import njit, prange
+    NUMBA_OK = True
+except ImportError:
+    NUMBA_OK = False
+
+try:
+    #CuPy est optionnel : même API que NumPy mais exécutée sur GPU, utile
+    #pour les tracés de convergence qui manipulent de très grands tirages
+    import cupy as xp
+    GPU_OK = True
+except ImportError:
+    xp = np
+    GPU_OK = False
+
+
+def _to_cpu(a):
+    #Ramène un tableau GPU côté CPU pour matplotlib ; no-op avec NumPy
+    return a.get() if GPU_OK else a
+
 #Estimation loi de Bernouilli
 
 def estimExp(N):
@@ -71,14 +100,51 @@ print(PBar(S0, K, T, r, sigma, N, seed))
 
 #Version plus simple et moins lourds du payoff
 
+if NUMBA_OK:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _mc_moments(Z, base, vol, K, disc, is_call, antithetic):
+        """Somme et somme des carrés des payoffs actualisés, en une boucle
+        compilée (prange) sans tableaux intermédiaires."""
+        s1 = 0.0
+        s2 = 0.0
+        for i in prange(Z.shape[0]):
+            e = math.exp(vol * Z[i])
+            p = base*e - K if is_call else K - base*e
+            if p < 0.0:
+                p = 0.0
+            if antithetic:
+                q = base/e - K if is_call else K - base/e
+                if q < 0.0:
+                    q = 0.0
+                p = (p + q) / 2
+            y = p * disc
+            s1 += y
+            s2 += y * y
+        return s1, s2
+
+
+def _mc_stats(s1, s2, N):
+    #Reconstruit (prix, IC 95%, erreur standard) à partir des deux moments
+    V0 = s1 / N
+    s = math.sqrt(max(s2 - N*V0*V0, 0.0) / (N - 1))
+    SE = s / math.sqrt(N)
+    return V0, V0 - 1.96*SE, V0 + 1.96*SE, SE
+
+
 def CallMC(S0, K, T, r, sigma, N, seed=None):
     rng = np.random.default_rng(seed) #Initialisation du générateur de nombres aléatoires pour obtenir des résultats reproductibles avec la seed 123
-    Z = rng.normal(0, 1, N) #Simulation d'une loi normale centrée réduite pour N variables
-    St = S0 * np.exp((r - 1/2*sigma**2)*T + sigma*Z*np.sqrt(T)) # Calcul de St pour chaque Zi
-    Pi = np.maximum(St - K, 0) #Calcul du payoff pour chaque St
-    Y = Pi * np.exp(-r*T) #Ajout du payoff pondéré à la liste Y
+    drift = (r - 1/2*sigma**2)*T #Constantes précalculées une fois en floats natifs (math) au lieu de re-passer par NumPy à chaque appel
+    vol = sigma*math.sqrt(T)
+    disc = math.exp(-r*T)
+    Z = rng.standard_normal(N) #Simulation d'une loi normale centrée réduite pour N variables (standard_normal évite les multiplications loc/scale de normal)
+    if NUMBA_OK:
+        return _mc_stats(*_mc_moments(Z, S0 * math.exp(drift), vol,
+                                      float(K), disc, True, False), N)
+    St = S0 * np.exp(drift + vol*Z) # Calcul de St pour chaque Zi
+    Y = np.maximum(St - K, 0) #Calcul du payoff pour chaque St
+    Y *= disc #Actualisation en place : pas de tableau intermédiaire Pi
     V0 = np.mean(Y) #Calcul du prix de l'option
-    s = ((1/(N-1))*np.sum((Y - V0)**2))**(1/2) #Calcul de la variance de Y
+    s = Y.std(ddof=1) #Ecart-type empirique en une passe (au lieu de (Y - V0)**2 puis sum)
     SE = s / np.sqrt(N) #Calcul de l'erreur standard
     IC_bas = V0 - 1.96*SE
     IC_haut = V0 + 1.96*SE
@@ -88,12 +154,18 @@ def CallMC(S0, K, T, r, sigma, N, seed=None):
 
 def PutMC(S0, K, T, r, sigma, N, seed=None):
     rng = np.random.default_rng(seed) #Initialisation du générateur de nombres aléatoires pour obtenir des résultats reproductibles avec la seed 123
-    Z = rng.normal(0, 1, N) #Simulation d'une loi normale centrée réduite pour N variables
-    St = S0 * np.exp((r - 1/2*sigma**2)*T + sigma*Z*np.sqrt(T)) # Calcul de St pour chaque Zi
-    Pi = np.maximum(K - St, 0) #Calcul du payoff pour chaque St
-    Y = Pi * np.exp(-r*T) #Ajout du payoff pondéré à la liste Y
+    drift = (r - 1/2*sigma**2)*T #Mêmes constantes hoistées que pour le call
+    vol = sigma*math.sqrt(T)
+    disc = math.exp(-r*T)
+    Z = rng.standard_normal(N) #Simulation d'une loi normale centrée réduite pour N variables (standard_normal évite les multiplications loc/scale de normal)
+    if NUMBA_OK:
+        return _mc_stats(*_mc_moments(Z, S0 * math.exp(drift), vol,
+                                      float(K), disc, False, False), N)
+    St = S0 * np.exp(drift + vol*Z) # Calcul de St pour chaque Zi
+    Y = np.maximum(K - St, 0) #Calcul du payoff pour chaque St
+    Y *= disc #Actualisation en place, même logique que CallMC
     V0 = np.mean(Y) #Calcul du prix de l'option
-    s = ((1/(N-1))*np.sum((Y - V0)**2))**(1/2) #Calcul de la variance de Y
+    s = Y.std(ddof=1) #Ecart-type empirique en une passe
     SE = s / np.sqrt(N) #Calcul de l'erreur standard
     IC_bas = V0 - 1.96*SE
     IC_haut = V0 + 1.96*SE
@@ -113,15 +185,22 @@ On remarque que les prix convergent vers la valeur analytique dans le modèle de
 
 def ACallMC(S0, K, T, r, sigma, N, seed=None):
     rng = np.random.default_rng(seed) #Initialisation du générateur de nombres aléatoires pour obtenir des résultats reproductibles avec la seed 123
-    Z = rng.normal(0, 1, N) #Simulation d'une loi normale centrée réduite pour N variables
-    St = S0 * np.exp((r - 1/2*sigma**2)*T + sigma*Z*np.sqrt(T)) # Calcul de St pour chaque Zi
-    Sn = S0 * np.exp((r - 1/2*sigma**2)*T - sigma*Z*np.sqrt(T))
-    Pplus = np.maximum(St - K, 0) #Calcul du payoff pour chaque St
-    Pmoins = np.maximum(Sn - K, 0)
-    Pi = (Pplus + Pmoins) / 2
-    Y = Pi * np.exp(-r*T) #Ajout du payoff pondéré à la liste Y
+    drift = (r - 1/2*sigma**2)*T
+    vol = sigma*math.sqrt(T)
+    disc = math.exp(-r*T)
+    Z = rng.standard_normal(N) #Simulation d'une loi normale centrée réduite pour N variables (standard_normal évite les multiplications loc/scale de normal)
+    base = S0 * math.exp(drift)
+    if NUMBA_OK:
+        return _mc_stats(*_mc_moments(Z, base, vol,
+                                      float(K), disc, True, True), N)
+    e = np.exp(vol*Z) #Une seule exponentielle vectorisée : la branche antithétique est 1/e
+    St = base * e # Calcul de St pour chaque Zi
+    Sn = base / e
+    Y = np.maximum(St - K, 0) #Calcul du payoff pour chaque St
+    Y += np.maximum(Sn - K, 0) #Moyenne des deux payoffs puis actualisation, en place
+    Y *= disc / 2
     V0 = np.mean(Y) #Calcul du prix de l'option
-    s = ((1/(N-1))*np.sum((Y - V0)**2))**(1/2) #Calcul de la variance de Y
+    s = Y.std(ddof=1) #Ecart-type empirique en une passe
     SE = s / np.sqrt(N) #Calcul de l'erreur standard
     IC_bas = V0 - 1.96*SE
     IC_haut = V0 + 1.96*SE
@@ -129,15 +208,22 @@ def ACallMC(S0, K, T, r, sigma, N, seed=None):
 
 def APutMC(S0, K, T, r, sigma, N, seed=None):
     rng = np.random.default_rng(seed) #Initialisation du générateur de nombres aléatoires pour obtenir des résultats reproductibles avec la seed 123
-    Z = rng.normal(0, 1, N) #Simulation d'une loi normale centrée réduite pour N variables
-    St = S0 * np.exp((r - 1/2*sigma**2)*T + sigma*Z*np.sqrt(T)) # Calcul de St pour chaque Zi
-    Smoins = S0 * np.exp((r - 1/2*sigma**2)*T - sigma*Z*np.sqrt(T))
-    PPlus = np.maximum(K - St, 0) #Calcul du payoff pour chaque St
-    Pmoins = np.maximum(K - Smoins, 0)
-    Pi = (PPlus + Pmoins) / 2
-    Y = Pi * np.exp(-r*T) #Ajout du payoff pondéré à la liste Y
+    drift = (r - 1/2*sigma**2)*T
+    vol = sigma*math.sqrt(T)
+    disc = math.exp(-r*T)
+    Z = rng.standard_normal(N) #Simulation d'une loi normale centrée réduite pour N variables (standard_normal évite les multiplications loc/scale de normal)
+    base = S0 * math.exp(drift)
+    if NUMBA_OK:
+        return _mc_stats(*_mc_moments(Z, base, vol,
+                                      float(K), disc, False, True), N)
+    e = np.exp(vol*Z) #Une seule exponentielle vectorisée, comme pour ACallMC
+    St = base * e # Calcul de St pour chaque Zi
+    Smoins = base / e
+    Y = np.maximum(K - St, 0) #Calcul du payoff pour chaque St
+    Y += np.maximum(K - Smoins, 0) #Moyenne des deux payoffs puis actualisation, en place
+    Y *= disc / 2
     V0 = np.mean(Y) #Calcul du prix de l'option
-    s = ((1/(N-1))*np.sum((Y - V0)**2))**(1/2) #Calcul de la variance de Y
+    s = Y.std(ddof=1) #Ecart-type empirique en une passe
     SE = s / np.sqrt(N) #Calcul de l'erreur standard
     IC_bas = V0 - 1.96*SE
     IC_haut = V0 + 1.96*SE
@@ -151,41 +237,56 @@ print(APutMC(S0, K, T, r, sigma, N))
 def TraceCallMC(S0, K, T, r, sigma, N):
     fig = plt.figure()
     axis = fig.add_subplot(1, 1, 1, aspect="auto")
-    X = np.arange(1000, N + 1, 5000) #On crée un intervalle d'entier de 1000 à N + 1 avec un pas de 5000
-    Y = []
-    Z = []
-    W = []
-    for i in X:
-        Yi, Zi, Wi, _ = CallMC(S0, K, T, r, sigma, i)
-        W.append(Wi)
-        Z.append(Zi)
-        Y.append(Yi) #On ajoute le prix de l'option pour chaque N et en ajoutant [0] ça prend simplement le prix de l'option
+    X = xp.arange(1000, N + 1, 5000) #On crée un intervalle d'entier de 1000 à N + 1 avec un pas de 5000
+    #Un seul tirage de N échantillons : chaque point de convergence est reconstruit
+    #par sommes cumulées au lieu de relancer CallMC de zéro pour chaque taille
+    rng = xp.random.default_rng()
+    drift = (r - 1/2*sigma**2)*T
+    vol = sigma*math.sqrt(T)
+    disc = math.exp(-r*T)
+    Zn = rng.standard_normal(N)
+    P = xp.maximum(S0 * xp.exp(drift + vol*Zn) - K, 0) * disc #Payoffs actualisés
+    csum = xp.cumsum(P)
+    csum2 = xp.cumsum(P*P)
+    Y = csum[X - 1] / X #Prix Monte Carlo pour chaque taille d'échantillon
+    SE = xp.sqrt((csum2[X - 1] - X*Y**2) / (X - 1) / X) #Erreur standard cumulée
+    Z = Y - 1.96*SE #Bornes de l'IC 95%
+    W = Y + 1.96*SE
+    X, Y, Z, W = _to_cpu(X), _to_cpu(Y), _to_cpu(Z), _to_cpu(W)
     axis.plot(X , Y, label ="Convergence du prix Monte Carlo (call)", linestyle = " ", marker = "x", markersize = 2)
     axis.plot(X , Z, label ="IC 95% borne basse", linestyle = "-", marker = "o", markersize = 2)
     axis.plot(X , W, label ="IC 95% borne haute", linestyle = "-", marker = "o", markersize = 2)
     axis.legend()
     axis.grid()
     plt.show()
+    plt.close(fig) #Libérer la figure : la mémoire s'accumule sinon en batch/notebook
 
 
 def TracerPutMC(S0, K, T, r, sigma, N):
     fig = plt.figure()
     ax = fig.add_subplot(1, 1, 1, aspect="auto")
-    X = np.arange(1000, N + 1, 5000) #On crée un intervalle d'entier de 1000 à N + 1 avec un pas de 5000
-    Y = []
-    Z = []
-    W = []
-    for i in X:
-        Yi, Zi, Wi, _ = PutMC(S0, K, T, r, sigma, i)
-        W.append(Wi)
-        Z.append(Zi)
-        Y.append(Yi) #On ajoute le prix de l'option pour chaque N et en ajoutant [0] ça prend simplement le prix de l'option
+    X = xp.arange(1000, N + 1, 5000) #On crée un intervalle d'entier de 1000 à N + 1 avec un pas de 5000
+    #Même reconstruction cumulée que TraceCallMC, avec le payoff du put
+    rng = xp.random.default_rng()
+    drift = (r - 1/2*sigma**2)*T
+    vol = sigma*math.sqrt(T)
+    disc = math.exp(-r*T)
+    Zn = rng.standard_normal(N)
+    P = xp.maximum(K - S0 * xp.exp(drift + vol*Zn), 0) * disc #Payoffs actualisés
+    csum = xp.cumsum(P)
+    csum2 = xp.cumsum(P*P)
+    Y = csum[X - 1] / X #Prix Monte Carlo pour chaque taille d'échantillon
+    SE = xp.sqrt((csum2[X - 1] - X*Y**2) / (X - 1) / X) #Erreur standard cumulée
+    Z = Y - 1.96*SE #Bornes de l'IC 95%
+    W = Y + 1.96*SE
+    X, Y, Z, W = _to_cpu(X), _to_cpu(Y), _to_cpu(Z), _to_cpu(W)
     ax.plot(X , Y, label ="Convergence du prix Monte Carlo put", linestyle = " ", marker = "x", markersize = 2)
     ax.plot(X , Z, label ="IC 95% borne basse", linestyle = "-", marker = "o", markersize = 2)
     ax.plot(X , W, label ="IC 95% borne haute", linestyle = "-", marker = "o", markersize = 2)
     ax.legend()
     ax.grid()
     plt.show()
+    plt.close(fig) #Libérer la figure : la mémoire s'accumule sinon en batch/notebook
 
 TraceCallMC(S0, K, T, r, sigma, N)
 TracerPutMC(S0, K, T, r, sigma, N)
@@ -198,38 +299,51 @@ Tracer l'écart entre la version antithétique de Monte Carlo et la version norm
 def CompTraceCall(S0, K, T, r, sigma, N, seed=None):
     fig = plt.figure()
     axe = fig.add_subplot(1, 1, 1, aspect="auto")
-    X = np.arange(1000, N + 1, 5000) #On crée un intervalle d'entier de 1000 à N + 1 avec un pas de 5000
-    Y = []
-    Z = []
-    for i in X:
-        Yi, _, _, _ = CallMC(S0, K, T, r, sigma, i)
-        Zi, _, _, _ = ACallMC(S0, K, T, r, sigma, i)
-        Z.append(Zi)
-        Y.append(Yi) #On ajoute le prix de l'option pour chaque N et en ajoutant [0] ça prend simplement le prix de l'option
+    X = xp.arange(1000, N + 1, 5000) #On crée un intervalle d'entier de 1000 à N + 1 avec un pas de 5000
+    #Un seul tirage partagé : les deux estimateurs (normal et antithétique)
+    #sont reconstruits par sommes cumulées sur les mêmes gaussiennes
+    rng = xp.random.default_rng(seed)
+    drift = (r - 1/2*sigma**2)*T
+    vol = sigma*math.sqrt(T)
+    disc = math.exp(-r*T)
+    base = S0 * math.exp(drift)
+    e = xp.exp(vol * rng.standard_normal(N))
+    P = xp.maximum(base*e - K, 0) * disc #Payoffs actualisés (estimateur normal)
+    Pa = (P + xp.maximum(base/e - K, 0) * disc) / 2 #Estimateur antithétique
+    Y = xp.cumsum(P)[X - 1] / X
+    Z = xp.cumsum(Pa)[X - 1] / X
+    X, Y, Z = _to_cpu(X), _to_cpu(Y), _to_cpu(Z)
     axe.plot(X , Y, label ="Normale", linestyle = "dashdot", marker = "x", markersize = 2)
     axe.plot(X , Z, label ="Antithétique", linestyle = "-", marker = "o", markersize = 2)
     axe.legend()
     axe.set_title(label = "Ecart entre la version antithétique de Monte Carlo et la version normale")
     axe.grid()
     plt.show()
+    plt.close(fig) #Libérer la figure : la mémoire s'accumule sinon en batch/notebook
 
 def CompTracePut(S0, K, T, r, sigma, N):
     fig = plt.figure()
     axe = fig.add_subplot(1, 1, 1, aspect="auto")
-    X = np.arange(1000, N + 1, 5000) #On crée un intervalle d'entier de 1000 à N + 1 avec un pas de 5000
-    Y = []
-    Z = []
-    for i in X:
-        Yi, _, _, _ = PutMC(S0, K, T, r, sigma, i)
-        Zi, _, _, _ = APutMC(S0, K, T, r, sigma, i)
-        Z.append(Zi)
-        Y.append(Yi) #On ajoute le prix de l'option pour chaque N et en ajoutant [0] ça prend simplement le prix de l'option
+    X = xp.arange(1000, N + 1, 5000) #On crée un intervalle d'entier de 1000 à N + 1 avec un pas de 5000
+    #Même tirage partagé que CompTraceCall, avec le payoff du put
+    rng = xp.random.default_rng()
+    drift = (r - 1/2*sigma**2)*T
+    vol = sigma*math.sqrt(T)
+    disc = math.exp(-r*T)
+    base = S0 * math.exp(drift)
+    e = xp.exp(vol * rng.standard_normal(N))
+    P = xp.maximum(K - base*e, 0) * disc #Payoffs actualisés (estimateur normal)
+    Pa = (P + xp.maximum(K - base/e, 0) * disc) / 2 #Estimateur antithétique
+    Y = xp.cumsum(P)[X - 1] / X
+    Z = xp.cumsum(Pa)[X - 1] / X
+    X, Y, Z = _to_cpu(X), _to_cpu(Y), _to_cpu(Z)
     axe.plot(X , Y, label ="Normale", linestyle = "dashdot", marker = "x", markersize = 2)
     axe.plot(X , Z, label ="Antithétique", linestyle = "-", marker = "o", markersize = 2)
     axe.legend()
     axe.set_title(label = "Ecart entre la version antithétique de Monte Carlo et la version normale")
     axe.grid()
     plt.show()
+    plt.close(fig) #Libérer la figure : la mémoire s'accumule sinon en batch/notebook
 
 CompTracePut(S0, K, T, r, sigma, N)
 CompTraceCall(S0, K, T, r, sigma, N)